@@ -1,62 +1,253 @@
+import contextvars
 import json
-import requests
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlparse, parse_qs
 import pandas as pd
-from config import API_BASE_URL, TOKEN_URL, UID, SECRET
+import requests
+from requests.utils import parse_header_links
+from cassette import CassetteMiss
+from config import API_BASE_URL, FETCH_MAX_WORKERS, RESPONSE_CACHE_ENABLED, SERVER_TABLE_PAGE_SIZE
 from dash import dash_table, html
+from http_client import get_client
+from metrics import metrics
+from profiling import stage, timed
+from response_cache import ResponseCache, make_key
+from single_flight import SingleFlight
+from token_manager import token_manager
 
-# 1. 액세스 토큰 가져오기
+# 1. 액세스 토큰 가져오기 (메모리/디스크 캐시, 만료 직전에만 재발급)
 def get_access_token():
-    data = {"grant_type": "client_credentials"}
-    response = requests.post(TOKEN_URL, data=data, auth=(UID, SECRET))
-    if response.status_code == 200:
-        return response.json().get("access_token")
-    print(f"🔑 토큰 요청 실패: {response.status_code}, {response.text}")
-    return None
+    return token_manager.get_token()
 
 
 # 2. 전체 페이지(또는 지정 페이지 수)의 '원본 데이터' 가져오기
-def fetch_pages(endpoint, params=None, max_pages=None):
+MAX_PAGE_SIZE = 100  # 42 API가 허용하는 최대 per_page
+PAGE_HEADERS = ("X-Total", "X-Per-Page", "X-Page", "Link")  # 캐시에 함께 저장할 응답 헤더
+
+# 같은 페이지 재요청을 줄이는 응답 캐시 (RESPONSE_CACHE_ENABLED=0 이면 사용 안 함)
+response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
+
+# 동시에 들어온 같은 페이지 요청은 HTTP 한 번으로 합침 (중복 클릭, 여러 사용자가 같은 API 조회)
+single_flight = SingleFlight()
+
+
+def _collect_metrics():
+    """/metrics 요청 때 캐시 / rate limiter / 토큰 통계를 지표로 변환"""
+    samples = [
+        ("intra_singleflight_coalesced_total", {}, single_flight.stats()["coalesced"]),
+        ("intra_token_hit_ratio", {}, token_manager.stats()["hit_ratio"]),
+    ]
+    if response_cache:
+        cache_stats = response_cache.stats()
+        samples.append(("intra_cache_hit_ratio", {}, cache_stats["hit_ratio"]))
+        samples.append(("intra_cache_entries", {}, cache_stats["memory_entries"]))
+    rate_limiter = get_client().rate_limiter
+    if rate_limiter:
+        for bucket, remaining in rate_limiter.headroom().items():
+            samples.append(("intra_ratelimit_headroom", {"bucket": bucket}, remaining))
+    return samples
+
+
+metrics.add_collector(_collect_metrics)
+
+
+class ApiError(Exception):
+    """응답 실패 (메시지는 화면에 그대로 보여줄 '❌ ...' 문자열)"""
+
+
+@timed("fetch")
+def _get_page(client, endpoint, params, page, use_cache=True):
     """
-    (변경 없음) 페이지네이션을 처리하여 API의 모든 데이터를 '원본 형태'로 가져옴
-    - dict 한 개, list 여러 개 등 API 응답 형태에 따라 달라질 수 있음
+    한 페이지 요청 -> (data, 페이지네이션 헤더 dict)
+    - 성공한 응답은 response_cache에 저장, 같은 (endpoint, params, page)는 캐시에서 바로 반환
+    - 캐시에 없고 같은 요청이 진행 중이면 새로 보내지 않고 그 결과를 기다림 (single_flight)
+    - 재시도 후에도 연결 / 타임아웃 오류면 ApiError (카세트 재생 중 기록이 없는 요청은 그대로 CassetteMiss)
+    - 인증 헤더는 요청마다 token_manager에서 (메모리 캐시라 비용 없음) -> 긴 내보내기 / 동기화 중에
+      토큰이 만료돼도 다음 요청은 새 토큰으로, 401이면 토큰을 버리고 새 토큰으로 한 번 더 요청
     """
-    access_token = get_access_token()
-    if not access_token:
-        return "❌ 토큰을 가져오지 못했습니다."
+    current_params = dict(params)
+    current_params["page"] = page  # 페이지 번호
 
-    headers = {"Authorization": f"Bearer {access_token}"}
-    full_url = f"{API_BASE_URL}{endpoint}"
-    all_data = []
-    page = 1
-    
-    print(f"🚀 페이지 API 요청 시작: {full_url}")
-
-    while True:
-        if max_pages and page > max_pages:
-            break
-        
-        current_params = dict(params or {})
-        current_params["page"] = page  # 페이지 번호
-        response = requests.get(full_url, headers=headers, params=current_params)
+    cache_key = make_key(endpoint, current_params, page)
+    if use_cache and response_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached[0], cached[1]
+
+    def send():
+        try:
+            return client.get(f"{API_BASE_URL}{endpoint}", headers=_auth_headers(), params=current_params)
+        except CassetteMiss:
+            raise
+        except requests.RequestException as e:
+            err_msg = f"❌ 요청 실패 ({type(e).__name__}): {endpoint}"
+            print(err_msg)
+            raise ApiError(err_msg) from e
+
+    def request_page():
+        response = send()
+        if response.status_code == 401:
+            # 토큰이 만료 / 무효화된 경우 -> 캐시를 버리고 새로 발급받은 토큰으로 한 번만 다시 요청
+            token_manager.invalidate()
+            response = send()
 
         if response.status_code != 200:
             err_msg = f"❌ 응답 실패 (코드 {response.status_code}): {response.text}"
             print(err_msg)
-            return err_msg
+            raise ApiError(err_msg)
 
         data = response.json()
-        # data가 list일 수도, dict일 수도 있음
-        if not data:
-            break
-        
-        # data가 list라면 -> extend
-        if isinstance(data, list):
-            all_data.extend(data)
-        else:
-            # dict 등 단일 객체인 경우 -> list에 추가
-            all_data.append(data)
-        page += 1
+        page_headers = {k: response.headers[k] for k in PAGE_HEADERS if k in response.headers}
+        if response_cache:
+            response_cache.set(cache_key, endpoint, [data, page_headers])
+        return data, page_headers
+
+    # 같은 페이지를 이미 다른 스레드가 요청 중이면 그 응답을 같이 사용
+    return single_flight.do(cache_key, request_page)
+
+
+def _last_page(page_headers, per_page):
+    """
+    첫 응답 헤더로 마지막 페이지 번호 계산
+    - Link 헤더의 rel="last" 우선, 없으면 X-Total / X-Per-Page
+    - 둘 다 없으면 None (빈 페이지가 나올 때까지 순차 요청)
+    """
+    links = parse_header_links(page_headers.get("Link", ""))
+    last_url = next((link["url"] for link in links if link.get("rel") == "last"), None)
+    if last_url:
+        query = parse_qs(urlparse(last_url).query)
+        for key in ("page", "page[number]"):
+            if query.get(key):
+                return int(query[key][0])
+
+    total = page_headers.get("X-Total")
+    if total is not None:
+        per_page = int(page_headers.get("X-Per-Page") or per_page)
+        return max(1, math.ceil(int(total) / per_page))
+    return None
+
+
+def _auth_headers():
+    access_token = get_access_token()
+    if not access_token:
+        raise ApiError("❌ 토큰을 가져오지 못했습니다.")
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def fetch_total(endpoint, params=None):
+    """
+    첫 페이지만 요청해서 전체 레코드 수(X-Total) 반환 (헤더가 없으면 None)
+    - 첫 페이지는 응답 캐시에 남으므로 같은 params로 iter_pages를 이어서 호출해도 중복 요청 없음
+    """
+    params = dict(params or {})
+    params.setdefault("per_page", MAX_PAGE_SIZE)
+    data, page_headers = _get_page(get_client(), endpoint, params, 1)
+    if "X-Total" in page_headers:
+        return int(page_headers["X-Total"])
+    return 0 if not data else None
+
+
+def _iter_ordered(fetch, pages, max_workers):
+    """
+    pages를 스레드 풀에서 미리 요청하되 결과는 페이지 순서대로 yield
+    - 앞서 요청하는 페이지 수를 max_workers * 2로 제한 -> 메모리 사용량 고정
+    """
+    pages = iter(pages)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # 요청한 스레드의 contextvars(프로파일 등)를 풀 스레드에서도 보이도록 복사해서 실행
+        def submit(page):
+            return executor.submit(contextvars.copy_context().run, fetch, page)
+
+        pending = deque(submit(page) for page in islice(pages, max_workers * 2))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                next_page = next(pages, None)
+                if next_page is not None:
+                    pending.append(submit(next_page))
+                yield result
+        finally:
+            # 소비자가 중간에 멈추면 아직 시작 안 한 요청은 취소
+            for future in pending:
+                future.cancel()
+
+
+def iter_pages(endpoint, params=None, max_pages=None, use_cache=True, start_page=1):
+    """
+    페이지 단위로 '원본 데이터'를 도착하는 대로 yield (각 페이지는 list)
+    - 첫 페이지 헤더(X-Total / Link)로 전체 페이지 수를 계산한 뒤
+      나머지 페이지는 스레드 풀에서 동시에 요청 (yield 순서는 페이지 순서 유지)
+    - use_cache=False면 응답 캐시를 건너뛰고 항상 새로 요청 (결과는 캐시에 갱신)
+    - start_page > 1이면 그 페이지부터 yield (이미 받아둔 앞 페이지는 건너뜀,
+      전체 페이지 수를 알기 위한 첫 페이지는 보통 응답 캐시에서 나옴)
+    - 실패하면 ApiError
+    """
+    client = get_client()
+    params = dict(params or {})
+    params.setdefault("per_page", MAX_PAGE_SIZE)  # 요청 수를 줄이도록 최대 크기로
+
+    def fetch(page):
+        return _get_page(client, endpoint, params, page, use_cache=use_cache)
+
+    print(f"🚀 페이지 API 요청 시작: {API_BASE_URL}{endpoint}")
+
+    data, first_headers = fetch(1)
+    # data가 list일 수도, dict일 수도 있음
+    if not data:
+        return
+    if not isinstance(data, list):
+        # dict 등 단일 객체인 경우 -> 페이지네이션 없음
+        if start_page <= 1:
+            yield [data]
+        return
+    if start_page <= 1:
+        yield data
+
+    last_page = _last_page(first_headers, int(params["per_page"]))
+    if max_pages:
+        last_page = min(last_page or max_pages, max_pages)
 
+    if last_page is None:
+        # 전체 개수를 알 수 없으면 빈 페이지가 나올 때까지 순차 요청
+        page = max(2, start_page)
+        while True:
+            data, _ = fetch(page)
+            if not data:
+                return
+            yield data if isinstance(data, list) else [data]
+            page += 1
+
+    # 2 ~ last_page 동시 요청 (FETCH_MAX_WORKERS개까지)
+    pages = range(max(2, start_page), last_page + 1)
+    if not pages:
+        return
+    for data, _ in _iter_ordered(fetch, pages, min(FETCH_MAX_WORKERS, len(pages))):
+        yield data if isinstance(data, list) else [data]
+
+
+def iter_records(endpoint, params=None, max_pages=None, use_cache=True):
+    """iter_pages를 레코드(아이템) 단위로 풀어서 yield"""
+    for page_data in iter_pages(endpoint, params=params, max_pages=max_pages, use_cache=use_cache):
+        yield from page_data
+
+
+def fetch_pages(endpoint, params=None, max_pages=None):
+    """
+    페이지네이션을 처리하여 API의 모든 데이터를 '원본 형태'로 가져옴 (iter_pages를 list로 모음)
+    - 첫 페이지부터 실패하면 '❌ ...' 에러 문자열을 반환
+    - 중간 페이지가 (재시도 후에도) 실패하면 그때까지 받은 데이터를 버리지 않고 반환
+    """
+    all_data = []
+    try:
+        for page_data in iter_pages(endpoint, params=params, max_pages=max_pages):
+            all_data.extend(page_data)
+    except ApiError as e:
+        if not all_data:
+            return str(e)
+        print(f"⚠️ 일부만 받음 ({len(all_data)}건): {e}")
     return all_data  # 최종적으로 list[dict or 기타] 형태가 됨
 
 
@@ -84,25 +275,23 @@ def universal_generate_table(data):
     if not isinstance(data, list):
         data = [{"value": str(data)}]
 
-    # 4) 리스트 내부 아이템 평탄화
-    flattened_list = []
-    for item in data:
-        if isinstance(item, dict):
-            flattened_item = flatten_dict(item)  # 재귀 평탄화
-            flattened_list.append(flattened_item)
-        else:
-            flattened_list.append({"value": str(item)})
+    # 4) 리스트 내부 아이템 평탄화 (레코드 모양별 계획 재사용)
+    # 전치하면 이미지가 행이 되는데 markdown은 컬럼 단위로만 켤 수 있음
+    # -> 로그인 / JSON 문자열까지 markdown으로 그려지지 않도록 이미지는 URL 그대로
+    flattened_list = flatten_records(data, images="url")
 
     if not flattened_list:
         return "✅ 응답 성공: 데이터가 없습니다."
 
     # 5) DataFrame 변환
-    df = pd.DataFrame(flattened_list)
+    with stage("dataframe"):
+        df = pd.DataFrame(flattened_list)
     if df.empty:
         return "✅ 응답 성공: 데이터가 없습니다."
 
     # 6) 전치(Transpose)
-    df_t = df.T.reset_index().rename(columns={"index": "Field"})
+    with stage("transpose"):
+        df_t = df.T.reset_index().rename(columns={"index": "Field"})
 
     # 7) Dash DataTable 생성
     return dash_table.DataTable(
@@ -127,11 +316,68 @@ def universal_generate_table(data):
     )
 
 
-def flatten_dict(d, parent_key="", sep="."):
+# 4. 서버 측 페이징 테이블 (전체 결과는 서버에, 브라우저에는 현재 페이지만)
+def server_side_table(endpoint, page_size=SERVER_TABLE_PAGE_SIZE):
+    """
+    "각 아이템이 행" 형태의 DataTable 껍데기만 생성
+    - 페이지 / 정렬 / 필터는 모두 custom -> callbacks의 update_server_table이
+      result_store에 캐시된 결과에서 현재 페이지만 잘라서 채움
+    - id에 endpoint를 넣어서 콜백이 어떤 결과를 보여줄지 알 수 있게 함
+    """
+    return dash_table.DataTable(
+        id={"type": "server-table", "index": endpoint},
+        columns=[],
+        data=[],
+        page_current=0,
+        page_size=page_size,
+        page_action="custom",
+        sort_action="custom",
+        sort_mode="multi",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
+        css=[{"selector": "img", "rule": "height: 50px;"}],
+        style_table={"overflowX": "auto"},
+        style_header={"fontWeight": "bold"},
+        style_cell={
+            "textAlign": "left",
+            "maxWidth": "300px",
+            "overflow": "hidden",
+            "textOverflow": "ellipsis",
+            "whiteSpace": "nowrap",
+        },
+    )
+
+
+# 5. 평탄화
+def is_image_field(key, value):
+    """이미지 URL 필드인지 (user.image / user.image.link 등)"""
+    return (
+        (key.endswith("image") or key.endswith("image.link"))
+        and isinstance(value, str)
+        and value.startswith("http")
+    )
+
+
+def render_image(url, images):
+    """
+    images="markdown": DataTable markdown 셀용 문자열 (컴포넌트 객체 없이 브라우저가 직접 로드)
+    images="component": html.Img 컴포넌트 (이전 방식)
+    images="url": URL 그대로
+    """
+    if images == "markdown":
+        return f"![image](<{url}>)"
+    if images == "component":
+        return html.Img(src=url, style={"height": "50px"})
+    return url
+
+
+def flatten_dict(d, parent_key="", sep=".", images="markdown"):
     """
     재귀적으로 nested dict를 평탄화.
     예: {"user":{"id":123,"image":"http://..."}} 
-        -> {"user.id": 123, "user.image": "http://..."}
+        -> {"user.id": 123, "user.image": "![image](<http://...>)"}
+    - 레코드가 많으면 flatten_records가 훨씬 빠름 (이 함수는 모양이 제각각인 레코드용)
     """
     items = {}
     for k, v in d.items():
@@ -139,16 +385,109 @@ def flatten_dict(d, parent_key="", sep="."):
 
         if isinstance(v, dict):
             # dict -> 재귀 평탄화
-            sub = flatten_dict(v, parent_key=new_key, sep=sep)
+            sub = flatten_dict(v, parent_key=new_key, sep=sep, images=images)
             items.update(sub)
         elif isinstance(v, list):
             # list -> JSON 문자열화 (혹은 원하는 방식)
-            items[new_key] = json.dumps(v, ensure_ascii=False)
+            items[new_key] = json.dumps(v, ensure_ascii=False) if v else "[]"
         else:
             # 일반 값
-            if new_key.endswith("image") and isinstance(v, str) and v.startswith("http"):
+            if is_image_field(new_key, v):
                 # 이미지 URL 처리
-                items[new_key] = html.Img(src=v, style={"height": "50px"})
+                items[new_key] = render_image(v, images)
             else:
                 items[new_key] = v
-    return items
\ No newline at end of file
+    return items
+
+
+class _ShapeMismatch(Exception):
+    """레코드 모양이 평탄화 계획과 다름"""
+
+
+_FLATTEN_PLANS = {}  # (최상위 키 목록, sep, images) -> [계획, ...]
+MAX_PLANS_PER_SHAPE = 8  # 같은 최상위 키에서 모양이 이보다 많이 갈리면 일반 평탄화 사용
+
+
+def _compile_plan(d, parent_key, sep):
+    """
+    레코드 하나로 평탄화 계획 생성: [(키, 결과 컬럼명, 하위 계획 또는 None, 이미지 후보 여부)]
+    - 결과 컬럼명 문자열을 미리 만들어 둬서 레코드마다 다시 만들지 않음
+    """
+    plan = []
+    for k, v in d.items():
+        new_key = f"{parent_key}{sep}{k}" if parent_key else k
+        sub_plan = _compile_plan(v, new_key, sep) if isinstance(v, dict) else None
+        plan.append((k, new_key, sub_plan, new_key.endswith("image") or new_key.endswith("image.link")))
+    return plan
+
+
+def _apply_plan(plan, d, out, images):
+    if len(d) != len(plan):
+        raise _ShapeMismatch
+    for k, new_key, sub_plan, image_candidate in plan:
+        v = d[k]  # 키가 없으면 KeyError -> 모양이 다름
+        v_type = type(v)
+        if sub_plan is not None:
+            if v_type is not dict:
+                raise _ShapeMismatch
+            _apply_plan(sub_plan, v, out, images)
+        elif v_type is dict:
+            raise _ShapeMismatch
+        elif v_type is list:
+            out[new_key] = json.dumps(v, ensure_ascii=False) if v else "[]"
+        elif image_candidate and v_type is str and v.startswith("http"):
+            out[new_key] = render_image(v, images)
+        else:
+            out[new_key] = v
+
+
+@timed("flatten")
+def flatten_records(records, sep=".", images="markdown"):
+    """
+    여러 레코드를 한 번에 평탄화 (결과는 flatten_dict와 같음)
+    - 최상위 키 목록이 같은 레코드끼리는 첫 레코드로 만든 평탄화 계획을 재사용
+      (계획은 모듈 전역에 캐시되어 같은 엔드포인트를 다시 조회할 때도 재사용)
+    - 중첩 dict 모양이 다르면(예: null <-> dict) 그 모양의 계획을 추가로 만들고,
+      모양이 너무 많으면 flatten_dict로 처리
+    - dict가 아닌 아이템은 {"value": str(item)}
+    """
+    flattened = []
+    append = flattened.append
+    for record in records:
+        if type(record) is not dict:
+            append({"value": str(record)})
+            continue
+
+        shape = (tuple(record), sep, images)
+        plans = _FLATTEN_PLANS.get(shape)
+        if plans is None:
+            plans = _FLATTEN_PLANS[shape] = []
+
+        out = {}
+        for plan in plans:
+            try:
+                _apply_plan(plan, record, out, images)
+                break
+            except (_ShapeMismatch, KeyError):
+                out = {}
+        else:
+            if len(plans) < MAX_PLANS_PER_SHAPE:
+                plan = _compile_plan(record, "", sep)
+                plans.append(plan)
+                _apply_plan(plan, record, out, images)
+            else:
+                out = flatten_dict(record, sep=sep, images=images)
+        append(out)
+    return flattened
+
+
+def markdown_columns(columns):
+    """DataTable column 정의 (이미지 필드 컬럼은 presentation=markdown)"""
+    return [
+        {
+            "name": str(col),
+            "id": str(col),
+            **({"presentation": "markdown"} if str(col).endswith(("image", "image.link")) else {}),
+        }
+        for col in columns
+    ]
@@ -1,13 +1,44 @@
 from dash import Dash
 import layout
 import callbacks
+import csv_export
+import metrics
+import profiling
+from config import BACKGROUND_CACHE_DIR, SCHEDULER_ENABLED
+from scheduler import scheduler
+
+# 백그라운드 콜백 매니저 (diskcache가 설치되어 있을 때만)
+try:
+    import diskcache
+    from dash import DiskcacheManager
+
+    background_manager = DiskcacheManager(diskcache.Cache(BACKGROUND_CACHE_DIR))
+except ImportError:
+    background_manager = None
 
 # Dash 앱 초기화
-app = Dash(__name__, suppress_callback_exceptions=True)
+app = Dash(
+    __name__,
+    suppress_callback_exceptions=True,
+    background_callback_manager=background_manager,
+)
 app.layout = layout.create_layout()
 
 # 콜백 등록
-callbacks.register_callbacks(app)
+callbacks.register_callbacks(app, background_manager=background_manager)
+
+# CSV 스트리밍 다운로드 라우트 등록 (Dash 내부 Flask 서버)
+csv_export.register_routes(app.server)
+
+# 요청 / 콜백 지표 수집 + Prometheus /metrics 라우트
+metrics.register_routes(app.server)
+
+# 콜백 프로파일링 (PROFILE_ENABLED=1, X-Profile: 1 헤더, 또는 ?profile=1로 연 페이지)
+profiling.register_routes(app.server)
+
+# 예약 작업 스케줄러 시작 (jobs.json, 여러 워커가 떠도 작업은 파일 락으로 한 번만 실행)
+if SCHEDULER_ENABLED:
+    scheduler.start()
 
 if __name__ == "__main__":
     app.run_server(debug=True)
@@ -0,0 +1,200 @@
+import argparse
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+MAX_PER_PAGE = 100
+BLACKHOLE_START = date(2019, 1, 1)  # 합성 cursus_users의 blackholed_at 시작일
+
+
+def make_record(resource, index, shape):
+    """
+    합성 레코드 (같은 index면 항상 같은 값)
+    - "flat": 스칼라 필드만
+    - "nested": 42 users와 비슷하게 중첩 dict + 이미지
+    - cursus_users는 shape와 무관하게 user / blackholed_at을 포함 (블랙홀 조회용)
+    """
+    record = {
+        "id": index,
+        "login": f"user{index}",
+        "created_at": f"2024-01-01T00:00:{index % 60:02d}.000Z",
+        "updated_at": f"2024-06-01T00:00:{index % 60:02d}.000Z",
+    }
+    if resource == "cursus_users":
+        blackholed = BLACKHOLE_START + timedelta(days=index % 2400)
+        record.update({
+            "blackholed_at": f"{blackholed}T12:00:00.000Z",
+            "level": round(index % 210 / 10, 2),
+            "user": {"id": index, "login": f"user{index}", "image": {"link": f"https://cdn.example/{index}.jpg"}},
+        })
+    elif shape == "nested":
+        record.update({
+            "email": f"user{index}@student.42.fr",
+            "image": {
+                "link": f"https://cdn.example/{index}.jpg",
+                "versions": {"small": f"https://cdn.example/s/{index}.jpg", "medium": None},
+            },
+            "campus": {"id": 29, "name": "Seoul", "language": {"id": 14, "name": "Korean"}},
+            "cursus_users": [{"cursus_id": 21, "level": index % 21}],
+            "pool_month": "march",
+            "active?": index % 7 != 0,
+        })
+    return record
+
+
+class MockIntra:
+    """
+    로컬 42 intra API 대역 (벤치마크 / 개발용)
+    - POST /oauth/token: 고정 토큰
+    - GET /v2/<resource>: 합성 레코드를 per_page / page로 나눠 응답
+      X-Total / X-Per-Page / X-Page / Link 헤더와 X-Secondly / X-Hourly-RateLimit-* 헤더 포함
+    - latency: 응답마다 지연(초), per_second: 초당 허용 요청 수 (넘으면 429 + Retry-After)
+    - per_hour: 서버를 띄운 뒤 한 시간 동안 허용 요청 수 (넘으면 남은 시간만큼 Retry-After)
+    - range[blackholed_at]=시작,끝 필터 지원 (블랙홀 조회 벤치마크)
+    - filter[id] / filter[login]=쉼표 목록 필터 지원 (여러 건 묶음 조회)
+    - error_rate: 목록 요청 중 이 비율만큼 502로 실패 (재시도 / 체크포인트 확인용)
+    """
+
+    def __init__(self, total=1000, latency=0.0, per_second=0, per_hour=0, shape="nested", error_rate=0.0):
+        self.total = total
+        self.error_rate = error_rate
+        self.latency = latency
+        self.per_second = per_second
+        self.per_hour = per_hour
+        self.shape = shape
+        self.requests = 0
+        self.accepted = 0  # 429가 아니었던 요청 수 (시간당 한도 계산용)
+        self._started = time.monotonic()
+        self.throttled = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self.app = self._create_app()
+        self._server = None
+
+    def _create_app(self):
+        app = Flask(__name__)
+
+        @app.post("/oauth/token")
+        def token():
+            return jsonify({"access_token": "mock-token", "expires_in": 7200, "created_at": int(time.time())})
+
+        @app.get("/v2/<path:path>")
+        def resource(path):
+            return self._respond(path)
+
+        return app
+
+    def _rate_limit(self):
+        """-> (남은 초당 요청 수, 한도 초과면 Retry-After 초 아니면 None)"""
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            while self._recent and self._recent[0] <= now - 1:
+                self._recent.popleft()
+            remaining = (self.per_second or 1000) - len(self._recent)
+            if self.per_hour and self.accepted >= self.per_hour:
+                self.throttled += 1
+                return remaining, max(1, int(3600 - (now - self._started)))
+            if self.per_second and len(self._recent) >= self.per_second:
+                self.throttled += 1
+                return remaining, 1
+            self._recent.append(now)
+            self.accepted += 1
+            return remaining - 1, None
+
+    def _matching_ids(self, resource):
+        ids = range(1, self.total + 1)
+        blackhole_range = request.args.get("range[blackholed_at]")
+        if resource == "cursus_users" and blackhole_range:
+            start, end = (datetime.strptime(v[:10], "%Y-%m-%d").date() for v in blackhole_range.split(","))
+            offset_start = (start - BLACKHOLE_START).days
+            offset_end = (end - BLACKHOLE_START).days
+            ids = [i for i in ids if offset_start <= i % 2400 <= offset_end]
+        # filter[id]=1,2,3 / filter[login]=user1,user2 (여러 건 한 번에 조회)
+        wanted = {int(v) for v in request.args.get("filter[id]", "").split(",") if v.isdigit()}
+        wanted |= {
+            int(v[4:]) for v in request.args.get("filter[login]", "").split(",")
+            if v.startswith("user") and v[4:].isdigit()
+        }
+        if "filter[id]" in request.args or "filter[login]" in request.args:
+            ids = [i for i in ids if i in wanted]
+        return ids
+
+    def _respond(self, path):
+        remaining, retry_after = self._rate_limit()
+        limit_headers = {
+            "X-Secondly-RateLimit-Limit": str(self.per_second or 1000),
+            "X-Secondly-RateLimit-Remaining": str(max(0, remaining)),
+            "X-Hourly-RateLimit-Limit": str(self.per_hour or 100000),
+            "X-Hourly-RateLimit-Remaining": str(max(0, (self.per_hour or 100000) - self.accepted)),
+        }
+        if retry_after is not None:
+            return jsonify({"error": "Too Many Requests"}), 429, {**limit_headers, "Retry-After": str(retry_after)}
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            return jsonify({"error": "Bad Gateway"}), 502, limit_headers
+
+        segments = path.strip("/").split("/")
+        resource = next((s for s in reversed(segments) if not s.isdigit()), "items")
+        if segments[-1].isdigit():
+            # /v2/users/123 -> 단일 객체
+            return jsonify(make_record(resource, int(segments[-1]), self.shape)), 200, limit_headers
+
+        ids = self._matching_ids(resource)
+        per_page = min(int(request.args.get("per_page", 30)), MAX_PER_PAGE)
+        page = int(request.args.get("page", 1))
+        start = (page - 1) * per_page
+        records = [make_record(resource, i, self.shape) for i in ids[start: start + per_page]]
+
+        last_page = max(1, math.ceil(len(ids) / per_page))
+        base = f"{request.base_url}?per_page={per_page}"
+        links = [f'<{base}&page={last_page}>; rel="last"']
+        if page < last_page:
+            links.append(f'<{base}&page={page + 1}>; rel="next"')
+        headers = {
+            **limit_headers,
+            "X-Total": str(len(ids)),
+            "X-Per-Page": str(per_page),
+            "X-Page": str(page),
+            "Link": ", ".join(links),
+        }
+        return jsonify(records), 200, headers
+
+    def start(self, host="127.0.0.1", port=0):
+        """백그라운드 스레드에서 서버 시작 -> 기본 URL (port=0이면 빈 포트 사용)"""
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)  # 요청마다 찍히는 접근 로그 끔
+        self._server = make_server(host, port, self.app, threaded=True)
+        threading.Thread(target=self._server.serve_forever, name="mock-intra", daemon=True).start()
+        return f"http://{host}:{self._server.server_port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+
+
+if __name__ == "__main__":
+    # 예: python benchmark/mock_intra.py --total 5000 --latency 0.2 --per-second 2
+    # -> .env 대신 API_BASE_URL=http://127.0.0.1:8042 TOKEN_URL=http://127.0.0.1:8042/oauth/token 로 대시보드 실행
+    parser = argparse.ArgumentParser(description="로컬 42 intra API 대역 서버")
+    parser.add_argument("--port", type=int, default=8042)
+    parser.add_argument("--total", type=int, default=1000, help="리소스별 레코드 수")
+    parser.add_argument("--latency", type=float, default=0.0, help="응답 지연(초)")
+    parser.add_argument("--per-second", type=int, default=0, help="초당 허용 요청 수 (0이면 무제한)")
+    parser.add_argument("--per-hour", type=int, default=0, help="시간당 허용 요청 수 (0이면 무제한)")
+    parser.add_argument("--shape", choices=("nested", "flat"), default="nested")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="502로 실패할 요청 비율")
+    args = parser.parse_args()
+
+    mock = MockIntra(
+        args.total, args.latency, args.per_second, args.per_hour, shape=args.shape, error_rate=args.error_rate
+    )
+    print(f"🧪 mock intra API: http://127.0.0.1:{args.port}")
+    mock.app.run(port=args.port, threaded=True)
@@ -0,0 +1,187 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 현재 파일의 디렉토리 기준으로 상위 폴더 경로 추가
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from mock_intra import MockIntra
+
+BENCHMARKS = ("fetch_pages", "flatten", "generate_table", "export_csv", "blackhole_sweep")
+
+
+def configure_environment(base_url, workdir, args):
+    """
+    대시보드 모듈을 import하기 전에 환경변수로 mock 서버와 임시 디렉토리를 지정
+    (config.py는 import 시점에 환경변수를 읽고, load_dotenv는 이미 있는 값을 덮어쓰지 않음)
+    """
+    os.environ.update({
+        "API_BASE_URL": base_url,
+        "TOKEN_URL": f"{base_url}/oauth/token",
+        "UID": "mock",
+        "SECRET": "mock",
+        "CACHE_DIR": os.path.join(workdir, "cache"),
+        "DATA_DIR": os.path.join(workdir, "data"),
+        "RESPONSE_CACHE_ENABLED": "1" if args.cache else "0",
+        "RATE_LIMIT_ENABLED": "1" if args.client_per_second else "0",
+        "RATE_LIMIT_PER_SECOND": str(args.client_per_second or 2),
+        "FETCH_MAX_WORKERS": str(args.workers),
+        "SCHEDULER_ENABLED": "0",
+        "PREFETCH_ENABLED": "0",
+    })
+
+
+def timed_runs(func, repeat):
+    """func를 repeat번 실행 -> (마지막 실행 결과, 실행별 초 목록)"""
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - started)
+    return result, seconds
+
+
+def summarize(seconds, **extra):
+    return {
+        "min": min(seconds),
+        "median": statistics.median(seconds),
+        "mean": statistics.mean(seconds),
+        "runs": seconds,
+        **extra,
+    }
+
+
+def run_benchmarks(mock, args):
+    # 환경변수를 정한 뒤에 import
+    from flask import Flask
+
+    import csv_export
+    from api_utils import fetch_pages, flatten_dict, flatten_records, universal_generate_table
+    from blackhole.get_all_blackhole import blackholed_frame
+
+    results = {}
+    selected = args.only or BENCHMARKS
+    records = None
+
+    if "fetch_pages" in selected or "flatten" in selected or "generate_table" in selected:
+        before = mock.requests
+        records, seconds = timed_runs(lambda: fetch_pages("/v2/users"), args.repeat)
+        if isinstance(records, str):
+            raise SystemExit(f"❌ fetch_pages 실패: {records}")
+        results["fetch_pages"] = summarize(
+            seconds,
+            records=len(records),
+            upstream_requests=(mock.requests - before) / args.repeat,
+            records_per_second=len(records) / statistics.median(seconds),
+        )
+
+    if "flatten" in selected:
+        _, seconds = timed_runs(lambda: [flatten_dict(record) for record in records], args.repeat)
+        results["flatten_dict"] = summarize(seconds, records=len(records))
+        _, seconds = timed_runs(lambda: flatten_records(records), args.repeat)
+        results["flatten_records"] = summarize(seconds, records=len(records))
+
+    if "generate_table" in selected:
+        for size in (10, 100):
+            _, seconds = timed_runs(lambda: universal_generate_table(records[:size]), args.repeat)
+            results[f"generate_table_{size}"] = summarize(seconds, records=min(size, len(records)))
+
+    if "export_csv" in selected:
+        server = Flask(__name__)
+        csv_export.register_routes(server)
+        client = server.test_client()
+
+        def export():
+            response = client.get("/export/csv?endpoint=/v2/users")
+            return sum(len(chunk) for chunk in response.response)
+
+        size, seconds = timed_runs(export, args.repeat)
+        results["export_csv"] = summarize(seconds, bytes=size)
+
+    if "blackhole_sweep" in selected:
+        before = mock.requests
+        df, seconds = timed_runs(lambda: blackholed_frame("all"), args.repeat)
+        results["blackhole_sweep"] = summarize(
+            seconds, rows=len(df), upstream_requests=(mock.requests - before) / args.repeat
+        )
+
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    """두 결과 파일의 median 비교를 stderr로 출력 (ratio가 1보다 작으면 빨라진 것)"""
+    print(f"{'benchmark':<20} {'baseline':>10} {'current':>10} {'ratio':>7}", file=sys.stderr)
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        ratio = result["median"] / old["median"] if old["median"] else float("inf")
+        print(f"{name:<20} {old['median']:>10.4f} {result['median']:>10.4f} {ratio:>7.2f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    # 예: python benchmark/run_benchmarks.py --total 5000 --latency 0.05 --output bench.json
+    #     python benchmark/run_benchmarks.py --compare bench.json
+    parser = argparse.ArgumentParser(description="mock intra API 대상 성능 측정")
+    parser.add_argument("--total", type=int, default=2000, help="리소스별 합성 레코드 수")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock 응답 지연(초)")
+    parser.add_argument("--server-per-second", type=int, default=0, help="mock 초당 허용 요청 수 (0이면 무제한)")
+    parser.add_argument("--server-per-hour", type=int, default=0, help="mock 시간당 허용 요청 수 (0이면 무제한)")
+    parser.add_argument("--client-per-second", type=float, default=0, help="클라이언트 rate limiter 초당 요청 수 (0이면 끔)")
+    parser.add_argument("--workers", type=int, default=4, help="FETCH_MAX_WORKERS")
+    parser.add_argument("--shape", choices=("nested", "flat"), default="nested")
+    parser.add_argument("--cache", action="store_true", help="응답 캐시 켜고 측정 (두 번째 실행부터 캐시 적중)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", choices=BENCHMARKS)
+    parser.add_argument("--output", help="결과 JSON 파일 (없으면 stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="이전 결과 JSON과 median 비교")
+    args = parser.parse_args()
+
+    mock = MockIntra(args.total, args.latency, args.server_per_second, args.server_per_hour, shape=args.shape)
+    base_url = mock.start()
+    with tempfile.TemporaryDirectory(prefix="intra-bench-") as workdir:
+        configure_environment(base_url, workdir, args)
+        try:
+            # 대시보드 모듈의 진행 로그는 stderr로 (stdout에는 결과 JSON만)
+            with contextlib.redirect_stdout(sys.stderr):
+                results = run_benchmarks(mock, args)
+        finally:
+            mock.stop()
+
+    report = {
+        "revision": git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "mock": {"requests": mock.requests, "throttled": mock.throttled},
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"📊 결과 저장: {args.output}")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
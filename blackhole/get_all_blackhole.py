@@ -2,20 +2,21 @@ import sys
 import os
 import requests
 import pandas as pd
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, datetime, timedelta
 import calendar
 
 # 현재 파일의 디렉토리 기준으로 상위 폴더 경로 추가
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 # 상위 디렉토리에 있는 모듈 import
-from config import API_BASE_URL, TOKEN_URL, UID, SECRET
-from api_utils import get_access_token
+from api_utils import ApiError, fetch_total, iter_records
+from mirror import Mirror
 
+ENDPOINT = "/v2/cursus_users"
+SHARD_MAX_RECORDS = 1000  # 샤드 하나가 이보다 많으면 기간을 반으로 나눔
+SHARD_WORKERS = 4  # 동시에 처리할 샤드 수
 
-def make_query_string(params, base_url):
-    query_string = "&".join([f"{key}={value}" for key, value in params.items()])
-    return f"{base_url}?{query_string}"
 
 def convert_to_kst(utc_time_str):
     utc_time = datetime.strptime(utc_time_str, "%Y-%m-%dT%H:%M:%S.%fZ")
@@ -33,50 +34,118 @@ def get_start_and_end_dates(year_month):
         end_date = f"{year}-{month:02d}-{last_day}"
     return start_date, end_date
 
-def get_blackholed_users(year_month):
+def yearly_shards(start, end):
+    """[start, end] 기간을 연 단위 샤드로 나눔"""
+    return [
+        (max(start, date(year, 1, 1)), min(end, date(year, 12, 31)))
+        for year in range(start.year, end.year + 1)
+    ]
+
+
+def split_shard(shard):
+    """샤드를 가운데 날짜 기준으로 둘로 나눔"""
+    start, end = shard
+    mid = start + (end - start) // 2
+    return [(start, mid), (mid + timedelta(days=1), end)]
+
+
+def shard_params(base_params, shard):
+    # 끝 날짜는 다음 날 0시까지 포함 (경계에 걸린 레코드는 ID 중복 제거로 처리)
+    start, end = shard
+    return {**base_params, "range[blackholed_at]": f"{start},{end + timedelta(days=1)}"}
+
+
+def iter_sharded_cursus_users(start_date, end_date, base_params):
+    """
+    기간을 샤드로 나눠 동시에 조회 ("all" 모드용)
+    - 연 단위 샤드의 첫 페이지(X-Total)를 보고 비어 있으면 건너뛰고,
+      SHARD_MAX_RECORDS보다 많으면 반으로 나눠 다시 확인
+    - 샤드 경계가 겹칠 수 있으므로 호출하는 쪽에서 ID로 중복 제거
+    """
+    def probe(shard):
+        return "probe", shard, fetch_total(ENDPOINT, shard_params(base_params, shard))
+
+    def fetch(shard):
+        return "items", shard, list(iter_records(ENDPOINT, params=shard_params(base_params, shard)))
+
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    with ThreadPoolExecutor(max_workers=SHARD_WORKERS) as executor:
+        pending = {executor.submit(probe, shard) for shard in yearly_shards(start, end)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, shard, result = future.result()
+                if kind == "items":
+                    yield from result
+                    continue
+
+                total = result
+                if total == 0:
+                    continue
+                if total is not None and total > SHARD_MAX_RECORDS and shard[0] < shard[1]:
+                    print(f"🧩 {shard[0]} ~ {shard[1]}: {total}건 -> 분할")
+                    pending |= {executor.submit(probe, half) for half in split_shard(shard)}
+                else:
+                    print(f"📦 {shard[0]} ~ {shard[1]}: {total if total is not None else '?'}건 조회")
+                    pending.add(executor.submit(fetch, shard))
+
+
+def iter_mirrored_cursus_users(start_date, end_date, campus_id="29"):
+    """로컬 미러를 증분 동기화한 뒤 blackholed_at이 기간 안인 레코드만 yield"""
+    mirror = Mirror("cursus_users")
+    filters = {"filter[campus_id]": campus_id}
+    mirror.sync(filters)
+    for item in mirror.records(filters):
+        blackholed_at = item.get("blackholed_at")
+        if blackholed_at and start_date <= blackholed_at[:10] <= end_date:
+            yield item
+
+
+def blackholed_frame(year_month, campus_id="29", use_mirror=False):
+    """
+    기간 안에 블랙홀에 빠진 유저 DataFrame (ID, Login, Blackholed_At)
+    - 실패하면 ApiError / requests.RequestException (스케줄러 작업에서도 사용)
+    """
     start_date, end_date = get_start_and_end_dates(year_month)
-
-    url = "https://api.intra.42.fr/v2/cursus_users"
+    base_params = {"filter[campus_id]": campus_id}
     params = {
-        "filter[campus_id]": "29",
-        "page[size]": "100",  # 전체 데이터를 가져오기 위해 페이지 크기 증가
+        **base_params,
         "range[blackholed_at]": f"{start_date},{end_date}"
     }
 
-    access_token = get_access_token()
-    headers = {
-        "Authorization": f"Bearer {access_token}"
+    # use_mirror면 바뀐 레코드만 받아 로컬 미러에서 조회,
+    # "all"이면 기간을 샤드로 나눠 동시에 조회, 아니면 API 한 번에 조회
+    if use_mirror:
+        items = iter_mirrored_cursus_users(start_date, end_date, campus_id)
+    elif year_month.lower() == "all":
+        items = iter_sharded_cursus_users(start_date, end_date, base_params)
+    else:
+        items = iter_records(ENDPOINT, params=params)
+
+    # 레코드가 도착하는 대로 필요한 세 필드만 남김 (원본 JSON은 쌓아두지 않음, ID로 중복 제거)
+    rows = {
+        item["id"]: [item["id"], item["user"]["login"], convert_to_kst(item["blackholed_at"])]
+        for item in items
     }
+    all_data = sorted(rows.values(), key=lambda row: row[2])
+    return pd.DataFrame(all_data, columns=["ID", "Login", "Blackholed_At"])
 
-    all_data = []
-    page = 1
 
+def get_blackholed_users(year_month, use_mirror=False, campus_id="29"):
     try:
-        while True:
-            response = requests.get(make_query_string({**params, "page[number]": page}, url), headers=headers)
-            response.raise_for_status()
-            json_data = response.json()
-
-            if not json_data:
-                break  # 더 이상 데이터가 없으면 종료
-
-            all_data.extend([
-                [item["id"], item["user"]["login"], convert_to_kst(item["blackholed_at"])]
-                for item in json_data
-            ])
-            page += 1  # 다음 페이지 요청
-
-        if all_data:
-            df = pd.DataFrame(all_data, columns=["ID", "Login", "Blackholed_At"])
+        df = blackholed_frame(year_month, campus_id, use_mirror)
+
+        if not df.empty:
             csv_file = "blackholed_users.csv"
             df.to_csv(csv_file, index=False, encoding="utf-8")
             print(f"데이터가 {csv_file} 파일로 저장되었습니다.")
         else:
             print("조회된 데이터가 없습니다.")
 
-    except requests.RequestException as e:
+    except (ApiError, requests.RequestException) as e:
         print(f"API 요청 중 오류 발생: {e}")
 
 if __name__ == "__main__":
     user_input = input('조회할 년-월을 입력하세요 (예: "2024-08" 또는 "all" 입력 시 전체 조회): ')
-    get_blackholed_users(user_input)
+    # --mirror: 로컬 미러(data/mirror/cursus_users.sqlite3)를 증분 동기화해서 조회
+    get_blackholed_users(user_input, use_mirror="--mirror" in sys.argv[1:])
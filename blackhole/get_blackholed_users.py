@@ -9,6 +9,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from config import API_BASE_URL, TOKEN_URL, UID, SECRET
 from api_utils import get_access_token
+from http_client import get_client
 
 # API 요청 URL 생성 (Google Apps Script의 makeQueryString 대체)
 def make_query_string(params, base_url):
@@ -49,7 +50,7 @@ def get_blackholed_users(year_month):
 
     try:
         # API 요청
-        response = requests.get(make_query_string(params, url), headers=headers)
+        response = get_client().get(make_query_string(params, url), headers=headers)
         response.raise_for_status()  # 오류 발생 시 예외 발생
         json_data = response.json()
 
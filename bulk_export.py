@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from api_categories import API_CATEGORIES
+from api_utils import MAX_PAGE_SIZE, ApiError, fetch_total, iter_pages
+from config import DATA_DIR
+from csv_export import write_csv_checkpointed
+
+DEFAULT_OUTPUT_DIR = os.path.join(DATA_DIR, "bulk")
+SUMMARY_FILE = "_summary.json"
+KNOWN_ENDPOINTS = {api["value"] for apis in API_CATEGORIES.values() for api in apis}
+
+_print_lock = threading.Lock()
+
+
+def log(message):
+    # 여러 작업 스레드의 진행 로그가 한 줄씩 섞이지 않도록
+    with _print_lock:
+        print(message, flush=True)
+
+
+def resolve_endpoint(template, path_params):
+    """"/v2/campus/:campus_id/users" + {"campus_id": 29} -> "/v2/campus/29/users" """
+    if template not in KNOWN_ENDPOINTS:
+        raise ValueError(f"API_CATEGORIES에 없는 엔드포인트: {template}")
+    endpoint = template
+    for name in re.findall(r":(\w+)", template):
+        if name not in path_params:
+            raise ValueError(f"경로 인자 누락: {template} (:{name})")
+        endpoint = endpoint.replace(f":{name}", str(path_params[name]))
+    return endpoint
+
+
+def load_manifest(path):
+    """
+    매니페스트(JSON) -> (설정 dict, 작업 목록)
+    {
+      "output_dir": "data/bulk", "max_age_hours": 24, "concurrency": 3,
+      "jobs": [
+        {"name": "seoul-users", "endpoint": "/v2/campus/:campus_id/users",
+         "path_params": {"campus_id": 29}, "params": {"filter[pool_year]": "2024"}}
+      ]
+    }
+    """
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    jobs = []
+    names = set()
+    for job in manifest.get("jobs", []):
+        name = job.get("name") or re.sub(r"[^0-9A-Za-z]+", "_", job["endpoint"]).strip("_")
+        if name in names:
+            raise ValueError(f"작업 이름 중복: {name}")
+        names.add(name)
+        jobs.append({
+            "name": name,
+            "endpoint": resolve_endpoint(job["endpoint"], job.get("path_params", {})),
+            "params": job.get("params", {}),
+        })
+    return manifest, jobs
+
+
+def is_fresh(path, max_age_hours):
+    return max_age_hours is not None and os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age_hours * 3600
+
+
+def run_job(job, output_dir):
+    """작업 하나 내보내기 -> 요약 dict (실패해도 예외 대신 status="failed")"""
+    name = job["name"]
+    started = time.time()
+    summary = {"name": name, "endpoint": job["endpoint"], "params": job["params"]}
+    try:
+        total = fetch_total(job["endpoint"], job["params"])
+        total_pages = -(-total // MAX_PAGE_SIZE) if total else None
+
+        def on_page(page, rows):
+            log(f"📦 [{name}] {page}/{total_pages or '?'}페이지 ({rows}건)")
+
+        path, rows = write_csv_checkpointed(
+            lambda start_page: iter_pages(job["endpoint"], params=job["params"], start_page=start_page),
+            {"bulk": name, "endpoint": job["endpoint"], "params": job["params"]},
+            f"{name}.csv",
+            export_dir=output_dir,
+            on_page=on_page,
+        )
+        summary.update(status="ok", rows=rows, path=path)
+        log(f"✅ [{name}] {rows}건 저장 ({time.time() - started:.1f}초)")
+    except (ApiError, requests.RequestException) as e:
+        summary.update(status="failed", error=str(e))
+        log(f"❌ [{name}] 실패 (다시 실행하면 체크포인트에서 이어받음): {e}")
+    summary["seconds"] = round(time.time() - started, 2)
+    return summary
+
+
+def bulk_export(jobs, output_dir=DEFAULT_OUTPUT_DIR, concurrency=3, max_age_hours=None):
+    """
+    작업들을 concurrency개씩 동시에 내보냄 -> 작업별 요약 목록
+    - concurrency를 올려도 전체 요청 속도는 그대로 (작업 수가 많을 때 대기 시간만 줄어듦)
+    - max_age_hours 안에 만든 결과 파일이 있으면 건너뜀
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    summaries = []
+    pending = []
+    for job in jobs:
+        path = os.path.join(output_dir, f"{job['name']}.csv")
+        if is_fresh(path, max_age_hours):
+            log(f"⏭️ [{job['name']}] 최신 결과 있음, 건너뜀")
+            summaries.append({"name": job["name"], "endpoint": job["endpoint"], "status": "skipped", "path": path})
+        else:
+            pending.append(job)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [executor.submit(run_job, job, output_dir) for job in pending]
+        for future in as_completed(futures):
+            summaries.append(future.result())
+
+    order = {job["name"]: i for i, job in enumerate(jobs)}
+    summaries.sort(key=lambda s: order[s["name"]])
+    return summaries
+
+
+def print_summary(summaries, seconds):
+    log("")
+    log(f"{'작업':<28} {'상태':<8} {'행 수':>8} {'시간(초)':>9}")
+    for s in summaries:
+        log(f"{s['name']:<28} {s['status']:<8} {s.get('rows', '-'):>8} {s.get('seconds', '-'):>9}")
+    counts = {status: sum(s["status"] == status for s in summaries) for status in ("ok", "skipped", "failed")}
+    log(f"📊 완료 {counts['ok']} / 건너뜀 {counts['skipped']} / 실패 {counts['failed']} (전체 {seconds:.1f}초)")
+
+
+if __name__ == "__main__":
+    # 예: python bulk_export.py manifest.json --concurrency 4 --max-age-hours 20
+    parser = argparse.ArgumentParser(description="매니페스트의 API들을 동시에 CSV로 내보내기")
+    parser.add_argument("manifest", help="매니페스트 JSON 파일")
+    parser.add_argument("--output-dir", help=f"출력 디렉토리 (기본: 매니페스트의 output_dir 또는 {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--concurrency", type=int, help="동시에 처리할 작업 수 (기본: 매니페스트 값 또는 3)")
+    parser.add_argument("--max-age-hours", type=float, help="이 시간 안에 만든 결과가 있으면 건너뜀")
+    parser.add_argument("--force", action="store_true", help="결과가 최신이어도 다시 내보내기")
+    args = parser.parse_args()
+
+    manifest, jobs = load_manifest(args.manifest)
+    output_dir = args.output_dir or manifest.get("output_dir") or DEFAULT_OUTPUT_DIR
+    if not args.output_dir and manifest.get("output_dir"):
+        # 매니페스트의 상대 경로는 매니페스트 파일 위치 기준
+        output_dir = os.path.join(os.path.dirname(os.path.abspath(args.manifest)), output_dir)
+    max_age_hours = None if args.force else (
+        args.max_age_hours if args.max_age_hours is not None else manifest.get("max_age_hours")
+    )
+
+    started = time.time()
+    summaries = bulk_export(jobs, output_dir, args.concurrency or manifest.get("concurrency", 3), max_age_hours)
+    print_summary(summaries, time.time() - started)
+
+    summary_path = os.path.join(output_dir, SUMMARY_FILE)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "seconds": round(time.time() - started, 2), "jobs": summaries},
+            f, ensure_ascii=False, indent=2,
+        )
+    log(f"📝 요약 저장: {summary_path}")
+    raise SystemExit(1 if any(s["status"] == "failed" for s in summaries) else 0)
@@ -1,15 +1,267 @@
-from dash import Input, Output, State, ctx, html, dcc, ALL
+from dash import Input, Output, State, ctx, html, dcc, ALL, MATCH
 import dash.exceptions
+import itertools
+import math
+import os
 import re
-import pandas as pd
-import io
+import time
+from urllib.parse import urlencode
 
 from api_categories import API_CATEGORIES
-from api_utils import fetch_pages, universal_generate_table  # (예시)
-from config import API_BASE_URL
+from api_utils import (  # (예시)
+    MAX_PAGE_SIZE,
+    ApiError,
+    markdown_columns,
+    server_side_table,
+    universal_generate_table,
+)
+from config import API_BASE_URL, SERVER_TABLE_MAX_RECORDS, SWEEP_MAX_ENDPOINTS
+from csv_export import export_filename, write_csv_checkpointed
+from expand import expand_pages, expand_records
+from metrics import metrics
+from prefetch import prefetcher
+from profiling import instrument_callbacks, stage
+from result_store import query_page, result_store
+from scheduler import scheduler
 
 
-def register_callbacks(app):
+def export_csv_href(handle, expand=False):
+    """
+    "CSV로 저장" 링크 주소 -> csv_export의 스트리밍 라우트
+    (전체 데이터를 콜백 메모리에 모으지 않고 받는 대로 브라우저에 전송)
+    """
+    query = {"handle": handle, "expand": 1} if expand else {"handle": handle}
+    return f"/export/csv?{urlencode(query)}"
+
+
+def render_result(result, table_mode, expand=False):
+    """
+    API 응답 영역 내용
+    - "preview": 첫 페이지 중 10개를 전치 테이블로
+    - "server": 전체 결과를 서버에 두고 페이지 / 정렬 / 필터만 주고받는 테이블
+      (전체가 SERVER_TABLE_MAX_RECORDS건을 넘으면 미리보기 + 안내만, 전체는 CSV 내보내기로)
+    - expand: user / project / campus 등 참조를 전체 정보로 펼쳐서 표시
+    미리보기로 받은 첫 페이지(100건)는 result에 남아 내보내기 / 서버 측 테이블이 이어서 사용
+    """
+    try:
+        preview = result.preview(10)
+        total = result.total() if table_mode == "server" else None  # 첫 페이지는 응답 캐시에서 나옴
+        if expand and (table_mode != "server" or (total or 0) > SERVER_TABLE_MAX_RECORDS):
+            preview = expand_records(preview)
+    except ApiError as e:
+        return str(e)
+
+    if table_mode == "server":
+        if not preview:
+            return "✅ 데이터가 없습니다."
+        if (total or 0) <= SERVER_TABLE_MAX_RECORDS:
+            return server_side_table(result.handle)
+        return html.Div([
+            html.P(
+                f"⚠️ 전체 {total}건은 전체 탐색 한도({SERVER_TABLE_MAX_RECORDS}건)를 넘어서 첫 10개만 표시합니다. "
+                "전체는 CSV로 저장하세요."
+            ),
+            universal_generate_table(preview),
+        ])
+    return universal_generate_table(preview)
+
+
+def parse_values(text, max_values=SWEEP_MAX_ENDPOINTS):
+    """
+    인자 입력 -> 값 목록
+    - 쉼표 / 공백 / 줄바꿈으로 구분 (엑셀 열을 붙여넣어도 됨), 중복 제거 (순서 유지)
+    - "1-5"처럼 숫자 범위는 1,2,3,4,5로 펼침
+    - 값이 max_values개를 넘으면 ValueError (범위는 펼치기 전에 크기부터 확인)
+    """
+    values = {}
+    for token in re.split(r"[\s,]+", str(text or "")):
+        match = re.fullmatch(r"(\d+)-(\d+)", token)
+        if match and int(match[1]) <= int(match[2]):
+            start, end = int(match[1]), int(match[2])
+            if end - start + 1 > max_values:
+                raise ValueError(f"❌ 범위가 너무 큽니다: {token} (최대 {max_values}개)")
+            values.update(dict.fromkeys(str(n) for n in range(start, end + 1)))
+        elif token:
+            values[token] = None
+        if len(values) > max_values:
+            raise ValueError(f"❌ 값이 너무 많습니다. (최대 {max_values}개)")
+    return list(values)
+
+
+def expand_template(template, inputs, max_endpoints=SWEEP_MAX_ENDPOINTS):
+    """
+    템플릿 + {인자: 입력} -> [{"values": {인자: 값}, "endpoint": 치환한 엔드포인트}, ...]
+    - 인자마다 값이 여러 개면 모든 조합
+    - 조합 수가 max_endpoints를 넘으면 만들기 전에 ValueError
+    """
+    names = list(inputs)
+    value_lists = [parse_values(inputs[name], max_endpoints) for name in names]
+    count = math.prod(len(values) for values in value_lists)
+    if count > max_endpoints:
+        raise ValueError(f"❌ 요청할 엔드포인트가 너무 많습니다. ({count}개, 최대 {max_endpoints}개)")
+
+    sources = []
+    for combo in itertools.product(*value_lists):
+        endpoint = template
+        for name, value in zip(names, combo):
+            endpoint = endpoint.replace(f":{name}", value)
+        sources.append({"values": dict(zip(names, combo)), "endpoint": endpoint})
+    return sources
+
+
+def export_progress(fetched, total):
+    """(progress value, progress max, 안내 문구)"""
+    total = total or fetched
+    pages, total_pages = math.ceil(fetched / MAX_PAGE_SIZE), math.ceil(total / MAX_PAGE_SIZE)
+    return fetched, max(total, 1), f"📄 {pages}/{total_pages} 페이지 · {fetched}/{total}건"
+
+
+def run_export(set_progress, handle, expand=False):
+    """
+    핸들이 가리키는 결과 전체를 EXPORT_DIR에 CSV로 저장
+    - 이미 받아둔 페이지는 재사용하고 나머지만 이어서 요청
+    - expand: 화면과 같이 참조(user / project / campus ...)를 페이지마다 펼쳐서 저장
+    - 페이지(100건)마다 set_progress로 받은 페이지 / 레코드 수를 보고
+    - 페이지마다 체크포인트 저장 -> 실패 / 취소된 내보내기를 다시 시작하면 이어서 받음
+    - 끝나면 /export/file/ 다운로드 링크 반환
+    """
+    result = result_store.get(handle)
+    if not result or not result.endpoint:
+        raise dash.exceptions.PreventUpdate
+
+    try:
+        total = result.total()  # 첫 페이지는 응답 캐시에서 나옴
+    except ApiError as e:
+        return str(e)
+    set_progress(export_progress(0, total))
+
+    key = {"endpoint": result.endpoint, "params": result.params}
+    if result.sources:
+        key["sources"] = result.sources
+    if expand:
+        key["expand"] = True  # 펼친 내보내기는 컬럼이 달라서 체크포인트도 따로
+
+    def pages_from(start_page):
+        pages = result.iter_pages(start_page, retain=False)
+        return expand_pages(pages) if expand else pages
+
+    fetched = 0
+
+    def on_page(page, rows):
+        nonlocal fetched
+        fetched = rows
+        set_progress(export_progress(rows, total))
+
+    try:
+        path, fetched = write_csv_checkpointed(
+            pages_from,
+            key,
+            # 핸들 / 펼치기 여부를 이름에 넣어 같은 초에 시작한 내보내기끼리 .part 파일을 공유하지 않도록
+            export_filename(result.endpoint, result.handle[:8] + ("_expanded" if expand else "")),
+            on_page=on_page,
+        )
+    except ApiError as e:
+        return f"{e} ({fetched}건까지 저장, 다시 내보내면 이어서 받습니다)"
+
+    set_progress(export_progress(fetched, total))
+    filename = os.path.basename(path)
+    return html.A(f"✅ {fetched}건 저장 완료: {filename} 다운로드", href=f"/export/file/{filename}")
+
+
+def freshness(timestamp):
+    """unix time -> "12분 전" 같은 경과 시간 표시"""
+    if not timestamp:
+        return "-"
+    minutes = int((time.time() - timestamp) // 60)
+    if minutes < 60:
+        return f"{minutes}분 전"
+    if minutes < 48 * 60:
+        return f"{minutes // 60}시간 전"
+    return f"{minutes // (24 * 60)}일 전"
+
+
+def render_jobs_panel():
+    """예약 작업 목록 -> 상태 / 신선도 / 다운로드 링크 표"""
+    try:
+        jobs = scheduler.overview()
+    except ValueError as e:
+        return f"❌ jobs.json 오류: {e}"
+    if not jobs:
+        return "예약된 작업이 없습니다. (jobs.example.json 참고, SCHEDULER_ENABLED=1)"
+
+    status_labels = {"ok": "✅ 완료", "running": "⏳ 실행 중", "failed": "❌ 실패", "pending": "대기"}
+    header = html.Tr([html.Th(col) for col in ("작업", "상태", "마지막 성공", "행 수", "다음 실행", "결과")])
+    rows = []
+    for job in jobs:
+        filename = job.get("filename")
+        rows.append(html.Tr([
+            html.Td(job["name"]),
+            html.Td(status_labels.get(job["status"], job["status"]), title=job.get("error") or ""),
+            html.Td(freshness(job.get("succeeded_at"))),
+            html.Td(job.get("rows") if job.get("rows") is not None else "-"),
+            html.Td(f"{job['next_run']:%m-%d %H:%M}"),
+            html.Td(html.A("📥 CSV", href=f"/export/file/{filename}") if filename else "-"),
+        ]))
+    return html.Table([header, *rows])
+
+
+def render_ops_panel():
+    """metrics 현재 값 -> 요청 수 / 지연 / 상태 코드 / 예산 / 캐시 / 느린 콜백 요약"""
+    counters, histograms, _, gauges = metrics.collect()
+
+    def total(name):
+        return sum(value for (key, _), value in counters.items() if key == name)
+
+    def sum_count(name):
+        pairs = [(hist[-2], hist[-1]) for (key, _), hist in histograms.items() if key == name]
+        return sum(p[0] for p in pairs), sum(p[1] for p in pairs)
+
+    statuses = {}
+    for (name, labels), value in counters.items():
+        if name == "intra_upstream_requests_total":
+            status = dict(labels)["status"]
+            statuses[status] = statuses.get(status, 0) + value
+    retries = {}
+    for (name, labels), value in counters.items():
+        if name == "intra_upstream_retries_total":
+            reason = dict(labels)["reason"]
+            retries[reason] = retries.get(reason, 0) + value
+    latency_sum, latency_count = sum_count("intra_upstream_request_seconds")
+    bytes_sum, _ = sum_count("intra_upstream_response_bytes")
+    headroom = {dict(labels)["bucket"]: value for (name, labels), value in gauges.items()
+                if name == "intra_ratelimit_headroom"}
+    cache_hit_ratio = gauges.get(("intra_cache_hit_ratio", ()))
+
+    slow_callbacks = sorted(
+        ((hist[-2] / hist[-1], hist[-1], dict(labels)["callback"])
+         for (name, labels), hist in histograms.items() if name == "intra_callback_seconds" and hist[-1]),
+        reverse=True,
+    )[:5]
+
+    items = [
+        f"업스트림 요청: {int(total('intra_upstream_requests_total'))}건 "
+        f"({', '.join(f'{status}: {int(count)}' for status, count in sorted(statuses.items())) or '-'})",
+        f"평균 지연: {latency_sum / latency_count:.3f}초" if latency_count else "평균 지연: -",
+        f"받은 데이터: {bytes_sum / 1024 / 1024:.1f}MB",
+        f"재시도: {int(total('intra_upstream_retries_total'))}건 "
+        f"({', '.join(f'{reason}: {int(count)}' for reason, count in sorted(retries.items())) or '-'}) / "
+        f"연결 오류: {int(total('intra_upstream_errors_total'))}건",
+        "남은 요청 예산: " + (", ".join(f"{bucket} {value:.0f}" for bucket, value in sorted(headroom.items())) or "-"),
+        f"응답 캐시 적중률: {cache_hit_ratio:.1%}" if cache_hit_ratio is not None else "응답 캐시: 사용 안 함",
+        f"합쳐진 중복 요청: {int(gauges.get(('intra_singleflight_coalesced_total', ()), 0))}건",
+    ]
+    return html.Div([
+        html.Ul([html.Li(item) for item in items]),
+        html.Div("느린 콜백 (평균)"),
+        html.Ul([html.Li(f"{avg:.3f}초 × {count}회: {name}") for avg, count, name in slow_callbacks] or [html.Li("-")]),
+        html.A("Prometheus /metrics", href="/metrics", target="_blank"),
+    ])
+
+
+def register_callbacks(app, background_manager=None):
+    # 콜백 함수 실행 시간을 프로파일의 "callback" 단계로 기록 (프로파일 중이 아니면 비용 없음)
+    app = instrument_callbacks(app)
+
     #
     # 카테고리 선택 → 버튼 목록
     #
@@ -21,6 +273,9 @@ def register_callbacks(app):
         if not selected_category:
             return ""
         api_list = API_CATEGORIES.get(selected_category, [])
+        if prefetcher:
+            # 버튼을 누르기 전에 파라미터 없는 API의 첫 페이지를 응답 캐시에 미리 받아둠
+            prefetcher.prefetch([api["value"] for api in api_list])
         buttons = [
             html.Button(
                 api["label"],
@@ -42,6 +297,7 @@ def register_callbacks(app):
             Output("send-request", "style"),
             Output("api-response-table", "children"),
             Output("save-csv", "style"),
+            Output("save-csv", "href"),
         ],
         [
             Input({"type": "api-button", "index": ALL}, "n_clicks"),
@@ -52,6 +308,8 @@ def register_callbacks(app):
             State({"type": "input", "index": ALL}, "id"),
             State({"type": "input", "index": ALL}, "value"),
             State("selected-endpoint", "data"),
+            State("table-mode", "value"),
+            State("expand-related", "value"),
         ],
         prevent_initial_call=True
     )
@@ -61,13 +319,16 @@ def register_callbacks(app):
         api_button_ids,
         dynamic_input_ids,
         dynamic_input_values,
-        stored_endpoint
+        stored_endpoint,
+        table_mode,
+        expand_related
     ):
         total_clicks_buttons = sum(api_button_n_clicks) if api_button_n_clicks else 0
         if total_clicks_buttons == 0 and (not send_request_n_clicks or send_request_n_clicks == 0):
             raise dash.exceptions.PreventUpdate
 
         triggered_id = ctx.triggered_id
+        expand = "expand" in (expand_related or [])
 
         # A. API 버튼 클릭
         if isinstance(triggered_id, dict) and triggered_id.get("type") == "api-button":
@@ -75,7 +336,8 @@ def register_callbacks(app):
             param_matches = re.findall(r":(\w+)", selected_endpoint)
 
             if param_matches:
-                # 파라미터가 있으면 인풋 필드 노출
+                # 파라미터가 있으면 인풋 필드 노출 (핸들에는 템플릿만 기록)
+                result = result_store.register(selected_endpoint)
                 inputs = []
                 for param in param_matches:
                     inputs.append(html.Label(f"{param} 입력:"))
@@ -83,95 +345,175 @@ def register_callbacks(app):
                         dcc.Input(
                             id={"type": "input", "index": param},
                             type="text",
-                            placeholder=f"{param} 값을 입력하세요"
+                            placeholder=f"{param} 값 (여러 개: 1,2,3 / 1-5)"
                         )
                     )
                 return (
                     html.Div(inputs),
-                    selected_endpoint,
+                    result.handle,
                     {"display": "block"},
                     "",
-                    {"display": "none"}
+                    {"display": "none"},
+                    ""
                 )
 
-            # 파라미터 없으면 -> 첫 페이지(10개)만 보여줌
-            data_list = fetch_pages(selected_endpoint, max_pages=1, params={"per_page": 10})
-            table = universal_generate_table(data_list)
+            # 파라미터 없으면 -> 첫 페이지(10개) 또는 서버 측 페이징 테이블
+            result = result_store.register(selected_endpoint, selected_endpoint)
+            table = render_result(result, table_mode, expand)
             if isinstance(table, str) and table.startswith("❌"):
-                return ("", selected_endpoint, {"display": "none"}, table, {"display": "none"})
+                return ("", result.handle, {"display": "none"}, table, {"display": "none"}, "")
 
             return (
                 "",
-                selected_endpoint,
+                result.handle,
                 {"display": "none"},
                 table,
-                {"display": "block"}
+                {"display": "block"},
+                export_csv_href(result.handle, expand)
             )
 
         # B. "API 요청 보내기" 버튼 클릭
         elif triggered_id == "send-request":
-            if not stored_endpoint:
+            stored = result_store.get(stored_endpoint)
+            if not stored:
                 return (
                     "",
                     "",
                     {"display": "none"},
                     "❌ API를 선택하세요.",
-                    {"display": "none"}
+                    {"display": "none"},
+                    ""
                 )
 
-            # 인자 치환
-            selected_endpoint = stored_endpoint
-            if dynamic_input_ids and dynamic_input_values:
-                for item, val in zip(dynamic_input_ids, dynamic_input_values):
-                    selected_endpoint = selected_endpoint.replace(f":{item['index']}", str(val))
+            # 인자 치환 (템플릿은 새 핸들에도 그대로 남아 다음 요청에 다시 사용)
+            # 목록 / 범위(1,2,3 / 1-5)를 넣으면 엔드포인트 여러 개를 동시에 받아 한 테이블로 합침
+            inputs = {item["index"]: val for item, val in zip(dynamic_input_ids or [], dynamic_input_values or [])}
+            try:
+                sources = expand_template(stored.template, inputs)
+            except ValueError as e:
+                sources, message = [], str(e)
+            else:
+                message = "❌ 인자 값을 입력하세요."
+            if not sources:
+                return (dash.no_update, stored.handle, {"display": "block"}, message, {"display": "none"}, "")
 
-            data_list = fetch_pages(selected_endpoint, max_pages=1, params={"per_page": 10})
-            table = universal_generate_table(data_list)
+            if len(sources) == 1:
+                result = result_store.register(stored.template, sources[0]["endpoint"])
+            else:
+                result = result_store.register(stored.template, stored.template, sources=sources)
+            table = render_result(result, table_mode, expand)
             if isinstance(table, str) and table.startswith("❌"):
                 return (
                     dash.no_update,
-                    stored_endpoint,
+                    result.handle,
                     {"display": "block"},
                     table,
-                    {"display": "none"}
+                    {"display": "none"},
+                    ""
                 )
 
             return (
                 dash.no_update,
-                stored_endpoint,
+                result.handle,
                 {"display": "block"},
                 table,
-                {"display": "block"}
+                {"display": "block"},
+                export_csv_href(result.handle, expand)
             )
         
         else:
             raise dash.exceptions.PreventUpdate
 
     #
-    # C. "CSV로 저장" 클릭 -> 전체 데이터 CSV
+    # C. 서버 측 페이징 테이블: 페이지 / 정렬 / 필터 변경 -> 현재 페이지만 전송
     #
     @app.callback(
-        Output("download-dataframe-csv", "data"),
-        Input("save-csv", "n_clicks"),
-        State("selected-endpoint", "data"),
-        prevent_initial_call=True
+        Output({"type": "server-table", "index": MATCH}, "data"),
+        Output({"type": "server-table", "index": MATCH}, "columns"),
+        Output({"type": "server-table", "index": MATCH}, "page_count"),
+        Input({"type": "server-table", "index": MATCH}, "page_current"),
+        Input({"type": "server-table", "index": MATCH}, "page_size"),
+        Input({"type": "server-table", "index": MATCH}, "sort_by"),
+        Input({"type": "server-table", "index": MATCH}, "filter_query"),
+        State({"type": "server-table", "index": MATCH}, "id"),
+        State("expand-related", "value"),
     )
-    def download_csv(n_clicks, stored_endpoint):
-        if not stored_endpoint:
+    def update_server_table(page_current, page_size, sort_by, filter_query, table_id, expand_related):
+        result = result_store.get(table_id["index"])
+        if not result:
             raise dash.exceptions.PreventUpdate
-
-        # 전체 페이지 가져오기
-        data_list = fetch_pages(stored_endpoint)
-        if isinstance(data_list, str) and data_list.startswith("❌"):
+        try:
+            # 처음 한 번만 전체를 받아 평탄화 (미리보기 페이지 재사용), 이후에는 서버 메모리의 결과 사용
+            frame = result.frame(expand="expand" in (expand_related or []))
+        except ApiError:
             raise dash.exceptions.PreventUpdate
 
-        # CSV 변환
-        df = pd.DataFrame(data_list)
-        if df.empty:
-            raise dash.exceptions.PreventUpdate
+        with stage("query"):
+            records, page_count, _ = query_page(frame, page_current or 0, page_size, sort_by, filter_query)
+        # 이미지 컬럼은 markdown 셀 -> 현재 페이지에 보이는 이미지만 브라우저가 로드
+        return records, markdown_columns(frame.columns), page_count
+
+    #
+    # D. 백그라운드 전체 내보내기 (진행률 표시 + 취소)
+    #
+    @app.callback(
+        Output("export-panel", "style"),
+        Input("save-csv", "style"),
+    )
+    def toggle_export_panel(save_csv_style):
+        # "CSV로 저장" 링크가 보일 때만 함께 표시
+        return {"margin-top": "10px", "display": (save_csv_style or {}).get("display", "none")}
 
-        csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False, encoding="utf-8-sig")
-        csv_buffer.seek(0)
+    if background_manager:
+        # 별도 프로세스에서 실행 -> Flask 워커 스레드를 붙잡지 않음, 취소 시 프로세스 종료
+        @app.callback(
+            output=Output("export-status", "children"),
+            inputs=Input("export-start", "n_clicks"),
+            state=[State("selected-endpoint", "data"), State("expand-related", "value")],
+            background=True,
+            manager=background_manager,
+            running=[
+                (Output("export-start", "disabled"), True, False),
+                (Output("export-cancel", "style"), {"display": "inline-block"}, {"display": "none"}),
+            ],
+            cancel=[Input("export-cancel", "n_clicks")],
+            progress=[
+                Output("export-progress", "value"),
+                Output("export-progress", "max"),
+                Output("export-progress-text", "children"),
+            ],
+            prevent_initial_call=True,
+        )
+        def export_in_background(set_progress, n_clicks, handle, expand_related):
+            return run_export(set_progress, handle, "expand" in (expand_related or []))
+    else:
+        # diskcache가 없으면 일반 콜백으로 실행 (진행률 / 취소 없음)
+        @app.callback(
+            Output("export-status", "children"),
+            Input("export-start", "n_clicks"),
+            State("selected-endpoint", "data"),
+            State("expand-related", "value"),
+            prevent_initial_call=True,
+        )
+        def export_in_foreground(n_clicks, handle, expand_related):
+            return run_export(lambda progress: None, handle, "expand" in (expand_related or []))
+
+    #
+    # E. 예약 작업으로 미리 계산된 데이터 (1분마다 상태 갱신)
+    #
+    @app.callback(
+        Output("jobs-panel", "children"),
+        Input("jobs-refresh", "n_intervals"),
+    )
+    def update_jobs_panel(n_intervals):
+        return render_jobs_panel()
 
-        return dcc.send_string(csv_buffer.getvalue(), filename="api_data.csv")
+    #
+    # F. 운영 지표 요약
+    #
+    @app.callback(
+        Output("ops-panel", "children"),
+        Input("ops-refresh", "n_intervals"),
+    )
+    def update_ops_panel(n_intervals):
+        return render_ops_panel()
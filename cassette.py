@@ -0,0 +1,122 @@
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config import HTTP_CASSETTE_MODE, HTTP_CASSETTE_PATH, HTTP_REPLAY_LATENCY
+
+CASSETTE_MODES = ("off", "record", "replay")
+DROPPED_HEADERS = ("Set-Cookie", "Content-Encoding", "Transfer-Encoding", "Content-Length")
+REDACTED_FIELDS = ("access_token", "refresh_token")  # 카세트 파일에 남기지 않을 응답 필드
+
+
+class CassetteMiss(requests.ConnectionError):
+    """재생 모드에서 카세트에 없는 요청 (네트워크 오류처럼 처리됨)"""
+
+
+def request_key(method, url, params=None):
+    """(메서드, 쿼리 파라미터까지 정규화한 URL) -> 카세트 키"""
+    prepared = requests.Request(method, url, params=params).prepare()
+    return f"{method.upper()} {prepared.url}"
+
+
+def _redact(body):
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if isinstance(data, dict) and any(field in data for field in REDACTED_FIELDS):
+        data.update({field: "replayed" for field in REDACTED_FIELDS if field in data})
+        return json.dumps(data, ensure_ascii=False)
+    return body
+
+
+class Cassette:
+    """
+    HTTP 요청 / 응답 기록과 재생 (gzip JSONL, 한 줄에 요청 하나)
+    - record: 실제 응답을 받을 때마다 키 / 상태 코드 / 헤더 / 본문 / 응답 시간을 한 줄씩 추가
+      (gzip 멤버를 이어 붙이는 방식이라 여러 번 기록해도 한 파일로 읽힘, 토큰 값은 가려서 저장)
+    - replay: 같은 키의 응답을 기록된 순서대로 돌려주고 마지막 응답은 계속 재사용
+      latency가 "recorded"면 기록된 응답 시간만큼, 숫자면 그 초만큼 기다림
+    """
+
+    def __init__(self, path=HTTP_CASSETTE_PATH, mode=HTTP_CASSETTE_MODE, latency=HTTP_REPLAY_LATENCY):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"알 수 없는 카세트 모드: {mode} ({', '.join(CASSETTE_MODES)})")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._file = None
+        self._entries = {}  # key -> deque(entry)
+        self._stats = {"recorded": 0, "replayed": 0, "missed": 0}
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"❌ 카세트 파일이 없습니다: {self.path}")
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], deque()).append(entry)
+        print(f"📼 카세트 재생: {self.path} ({len(self._entries)}개 요청)")
+
+    def record(self, method, url, params, response, elapsed):
+        entry = {
+            "key": request_key(method, url, params),
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k not in DROPPED_HEADERS},
+            "body": _redact(response.text),
+            "elapsed": elapsed,
+            "recorded_at": time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = gzip.open(self.path, "at", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            self._stats["recorded"] += 1
+
+    def replay(self, method, url, params=None):
+        key = request_key(method, url, params)
+        with self._lock:
+            queue = self._entries.get(key)
+            if not queue:
+                self._stats["missed"] += 1
+                raise CassetteMiss(f"❌ 카세트에 없는 요청: {key}")
+            entry = queue.popleft() if len(queue) > 1 else queue[0]
+            self._stats["replayed"] += 1
+
+        if self.latency == "recorded":
+            time.sleep(entry["elapsed"])
+        elif self.latency:
+            time.sleep(float(self.latency))
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = key.split(" ", 1)[1]
+        response.elapsed = timedelta(seconds=entry["elapsed"])
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
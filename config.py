@@ -12,3 +12,116 @@ REDIRECT_URL = os.getenv("REDIRECT_URL", "http://localhost:8000/auth/callback")
 API_BASE_URL = os.getenv("API_BASE_URL")
 TOKEN_URL = os.getenv("TOKEN_URL")
 AUTH_URL = os.getenv("AUTH_URL")
+
+# 로컬 캐시 디렉토리 (토큰 등, 모든 Dash 워커와 CLI 스크립트가 공유)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+
+# 액세스 토큰 캐시 파일 / 만료 몇 초 전에 미리 갱신할지
+TOKEN_CACHE_PATH = os.getenv("TOKEN_CACHE_PATH", os.path.join(CACHE_DIR, "token.json"))
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", "60"))
+
+# 공유 HTTP 클라이언트 (keep-alive 커넥션 풀)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))  # 호스트당 유지할 커넥션 수
+HTTP_HOST_POOL_SIZES = os.getenv("HTTP_HOST_POOL_SIZES", "")  # 예: "api.intra.42.fr=20,other.host=4"
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT", "42DashboardClient")
+
+# 요청 속도 제한 (42 API 기본: 초당 2회, 시간당 1200회)
+# 모든 Dash 콜백 스레드 / gunicorn 워커 / 스크립트가 같은 SQLite 장부를 공유
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "2"))
+RATE_LIMIT_PER_HOUR = float(os.getenv("RATE_LIMIT_PER_HOUR", "1200"))
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", os.path.join(CACHE_DIR, "ratelimit.sqlite3"))
+
+# 일시적 실패(429 / 5xx / 연결 오류) 재시도: 지터를 넣은 지수 백오프 (base * 2^시도, 최대 max초)
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "4"))
+HTTP_RETRY_STATUSES = tuple(int(s) for s in os.getenv("HTTP_RETRY_STATUSES", "429,500,502,503,504").split(","))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+
+# 조회 하나에서 동시에 보낼 페이지 요청 수
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "4"))
+
+# CSV 스트리밍 내보내기
+CSV_HEADER_SAMPLE = int(os.getenv("CSV_HEADER_SAMPLE", "200"))  # 헤더를 정할 때 미리 볼 레코드 수
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "500"))  # 몇 행마다 브라우저로 내보낼지
+
+
+def _parse_mapping(spec, cast):
+    """"users=300,campus=86400" -> {"users": 300, "campus": 86400}"""
+    mapping = {}
+    for item in spec.split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            mapping[key.strip()] = cast(value)
+    return mapping
+
+
+# API 응답 캐시 (메모리 LRU + 디스크 SQLite)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB", os.path.join(CACHE_DIR, "responses.sqlite3"))
+RESPONSE_CACHE_MEMORY_BYTES = int(os.getenv("RESPONSE_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_DISK_BYTES = int(os.getenv("RESPONSE_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+RESPONSE_CACHE_DEFAULT_TTL = int(os.getenv("RESPONSE_CACHE_DEFAULT_TTL", "600"))
+# 엔드포인트 계열(경로의 마지막 리소스 이름)별 TTL(초), 환경변수로 덮어쓰기 가능
+RESPONSE_CACHE_TTLS = {
+    "locations": 60,
+    "scale_teams": 120,
+    "users": 300,
+    "cursus_users": 300,
+    "projects_users": 300,
+    "events": 600,
+    "projects": 3600,
+    "achievements": 3600,
+    "campus": 86400,
+    "cursus": 86400,
+    "titles": 86400,
+    **_parse_mapping(os.getenv("RESPONSE_CACHE_TTLS", ""), int),
+}
+
+# 로컬 미러 (리소스별 SQLite, updated_at 기준 증분 동기화)
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(BASE_DIR, "data"))
+MIRROR_DIR = os.getenv("MIRROR_DIR", os.path.join(DATA_DIR, "mirror"))
+
+# 서버 측 결과 저장소 (조회 결과를 핸들로 공유, 받은 페이지는 워커 메모리에 보관)
+RESULT_STORE_MAX_RESULTS = int(os.getenv("RESULT_STORE_MAX_RESULTS", "8"))
+RESULT_STORE_DB = os.getenv("RESULT_STORE_DB", os.path.join(CACHE_DIR, "results.sqlite3"))
+RESULT_MAX_RETAINED_RECORDS = int(os.getenv("RESULT_MAX_RETAINED_RECORDS", "100000"))  # 결과 하나가 메모리에 들고 있을 최대 레코드 수
+SERVER_TABLE_PAGE_SIZE = int(os.getenv("SERVER_TABLE_PAGE_SIZE", "25"))
+SERVER_TABLE_MAX_RECORDS = int(os.getenv("SERVER_TABLE_MAX_RECORDS", "5000"))  # 전체 탐색으로 콜백 안에서 받을 최대 레코드 수
+# 연관 항목 펼치기 (user / project / campus 요약 -> 전체 정보)에 쓰는 엔티티 캐시
+ENTITY_CACHE_DB = os.getenv("ENTITY_CACHE_DB", os.path.join(CACHE_DIR, "entities.sqlite3"))
+# 인자 입력에 목록 / 범위(1,2,3 / 1-5)를 넣었을 때 한 번에 조회할 최대 엔드포인트 수
+SWEEP_MAX_ENDPOINTS = int(os.getenv("SWEEP_MAX_ENDPOINTS", "200"))
+
+# 백그라운드 내보내기 (Dash background callback + diskcache)
+BACKGROUND_CACHE_DIR = os.getenv("BACKGROUND_CACHE_DIR", os.path.join(CACHE_DIR, "background"))
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(DATA_DIR, "exports"))
+# 이보다 오래된 내보내기 체크포인트는 이어받지 않고 처음부터 (그 사이 데이터가 바뀌어 페이지가 밀렸을 수 있음)
+EXPORT_CHECKPOINT_MAX_AGE = int(os.getenv("EXPORT_CHECKPOINT_MAX_AGE", str(6 * 3600)))
+
+# 카테고리 선택 시 파라미터 없는 API의 첫 페이지를 미리 받아 응답 캐시에 저장
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_MAX_ENDPOINTS = int(os.getenv("PREFETCH_MAX_ENDPOINTS", "20"))  # 카테고리 하나에서 미리 받을 최대 API 수
+PREFETCH_HOURLY_RESERVE = int(os.getenv("PREFETCH_HOURLY_RESERVE", "300"))  # 시간당 예산이 이만큼 남으면 미리 받기 중단
+
+# 예약 작업 (jobs.json에 정의한 무거운 조회를 한가한 시간에 미리 실행, 결과는 EXPORT_DIR에 저장)
+# 기본은 꺼둠: 켜려면 jobs.example.json을 jobs.json으로 복사해 고치고 SCHEDULER_ENABLED=1
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "0") == "1"
+JOBS_FILE = os.getenv("JOBS_FILE", os.path.join(BASE_DIR, "jobs.json"))
+JOBS_DB = os.getenv("JOBS_DB", os.path.join(DATA_DIR, "jobs.sqlite3"))
+SCHEDULER_POLL_SECONDS = int(os.getenv("SCHEDULER_POLL_SECONDS", "30"))
+
+# 프로파일링 (cProfile + 단계별 시간, 결과는 PROFILE_DIR에 요청별 파일로)
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "1.0"))  # PROFILE_ENABLED일 때 프로파일할 콜백 요청 비율
+PROFILE_MEMORY = os.getenv("PROFILE_MEMORY", "0") == "1"  # tracemalloc (느려지므로 필요할 때만)
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
+
+# HTTP 기록 / 재생 (off: 사용 안 함, record: 요청과 응답을 카세트에 기록, replay: 카세트에서 응답)
+HTTP_CASSETTE_MODE = os.getenv("HTTP_CASSETTE_MODE", "off")
+HTTP_CASSETTE_PATH = os.getenv("HTTP_CASSETTE_PATH", os.path.join(DATA_DIR, "cassettes", "default.jsonl.gz"))
+# 재생 지연: 비우면 지연 없음, "recorded"면 기록된 응답 시간만큼, 숫자면 그 초만큼
+HTTP_REPLAY_LATENCY = os.getenv("HTTP_REPLAY_LATENCY", "")
@@ -0,0 +1,257 @@
+import csv
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import time
+from itertools import chain, islice
+
+from flask import Response, abort, current_app, request, send_from_directory, stream_with_context
+
+from api_utils import MAX_PAGE_SIZE, ApiError, iter_records
+from config import CSV_HEADER_SAMPLE, CSV_CHUNK_ROWS, EXPORT_CHECKPOINT_MAX_AGE, EXPORT_DIR
+from expand import expand_pages
+from metrics import PAGES_BUCKETS, metrics
+from mirror import mirror_for_endpoint
+from result_store import result_store
+
+EXTRA_COLUMN = "_extra"  # 헤더 확정 이후에 처음 나온 필드를 JSON으로 모아두는 컬럼
+
+
+def _cell(value):
+    # 중첩 dict / list 는 JSON 문자열로
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if value is None:
+        return ""
+    return value
+
+
+def iter_csv_chunks(records, sample_size=CSV_HEADER_SAMPLE, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    레코드 iterator -> CSV 문자열 조각 (메모리 사용량은 sample_size + chunk_rows 행 정도로 고정)
+    - 처음 sample_size개 레코드에 나온 필드 순서대로 헤더 확정
+    - 그 뒤에 처음 보는 필드는 버리지 않고 마지막 '_extra' 컬럼에 JSON으로 저장
+    """
+    records = iter(records)
+    sample = list(islice(records, sample_size))
+    columns = _columns(sample)
+    seen = set(columns)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns + [EXTRA_COLUMN])
+
+    def flush():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    yield "\ufeff" + flush()  # utf-8-sig (엑셀 한글 깨짐 방지)
+
+    rows = 0
+    for record in _chain(sample, records):
+        writer.writerow(_csv_row(record, columns, seen))
+        rows += 1
+        if rows % chunk_rows == 0:
+            yield flush()
+
+    if buffer.tell():
+        yield flush()
+    # 끝까지 내보낸 경우만 기록 (중간에 끊기면 generator가 여기까지 오지 않음)
+    metrics.observe("intra_export_pages", math.ceil(rows / MAX_PAGE_SIZE), buckets=PAGES_BUCKETS)
+
+
+def _columns(sample):
+    """샘플 레코드에 나온 필드를 처음 나온 순서대로"""
+    columns = {}
+    for record in sample:
+        for key in (record if isinstance(record, dict) else {"value": record}):
+            columns.setdefault(key, None)
+    return list(columns)
+
+
+def _csv_row(record, columns, seen):
+    """레코드 -> CSV 한 행 (헤더에 없는 필드는 마지막 _extra 컬럼에 JSON으로)"""
+    if not isinstance(record, dict):
+        record = {"value": record}
+    extra = {k: v for k, v in record.items() if k not in seen}
+    return [_cell(record.get(col)) for col in columns] + [json.dumps(extra, ensure_ascii=False) if extra else ""]
+
+
+def _chain(sample, rest):
+    # 샘플은 쓰는 즉시 참조를 놓아 메모리 해제
+    while sample:
+        yield sample.pop(0)
+    yield from rest
+
+
+def export_filename(endpoint, tag=None):
+    """
+    /v2/users/123/locations -> v2_users_123_locations_20250101-120000.csv
+    (tag가 있으면 시각 뒤에 붙임 -> 같은 초에 시작한 다른 내보내기와 파일이 겹치지 않도록)
+    """
+    slug = re.sub(r"[^0-9A-Za-z]+", "_", endpoint).strip("_")
+    suffix = f"_{tag}" if tag else ""
+    return f"{slug}_{time.strftime('%Y%m%d-%H%M%S')}{suffix}.csv"
+
+
+def _checkpoint_path(key, export_dir):
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return os.path.join(export_dir, ".checkpoints", f"{digest}.json")
+
+
+def write_csv_checkpointed(pages_from, key, filename, export_dir=EXPORT_DIR, on_page=None):
+    """
+    페이지 iterator -> EXPORT_DIR/filename CSV, 페이지마다 체크포인트 저장 -> (경로, 행 수) 반환
+    - pages_from(start_page): start_page부터 페이지(list)를 yield하는 함수
+    - key: 같은 내보내기인지 구분하는 값 (예: {"endpoint": ..., "params": ...})
+    - 페이지를 다 쓸 때마다 .part 파일 크기 / 마지막 페이지 / 헤더를 체크포인트에 기록
+      -> 실패 / 취소 / 프로세스 종료 뒤 같은 key로 다시 부르면 체크포인트의 파일 이름으로
+         다음 페이지부터 이어서 받음 (체크포인트 이후에 쓰다 만 부분은 잘라냄)
+    - EXPORT_CHECKPOINT_MAX_AGE보다 오래전에 시작한 체크포인트는 버리고 처음부터
+      (오래 지나면 데이터가 바뀌어 페이지 경계가 밀림 -> 이어 붙이면 행이 중복 / 누락됨)
+    - on_page(page, rows): 페이지를 쓸 때마다 호출 (진행률 표시용)
+    - 실패하면 ApiError 그대로 (체크포인트는 남음)
+    """
+    checkpoint_path = _checkpoint_path(key, export_dir)
+    try:
+        with open(checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        checkpoint = None
+    if checkpoint and time.time() - checkpoint.get("created_at", 0) > EXPORT_CHECKPOINT_MAX_AGE:
+        print(f"🗑 오래된 체크포인트는 버리고 처음부터: {checkpoint['filename']}")
+        stale_part = os.path.join(export_dir, checkpoint["filename"] + ".part")
+        if os.path.exists(stale_part):
+            os.remove(stale_part)
+        checkpoint = None
+
+    if checkpoint:
+        filename = checkpoint["filename"]
+    path = os.path.join(export_dir, filename)
+    part_path = path + ".part"
+    if checkpoint and not (os.path.exists(part_path) and os.path.getsize(part_path) >= checkpoint["bytes"]):
+        checkpoint = None  # .part 파일이 없거나 짧으면 처음부터
+
+    if checkpoint:
+        print(f"♻️ 체크포인트에서 이어받기: {filename} ({checkpoint['page']}페이지, {checkpoint['rows']}건까지 완료)")
+        with open(part_path, "r+b") as f:
+            f.truncate(checkpoint["bytes"])
+        columns, rows, page = checkpoint["columns"], checkpoint["rows"], checkpoint["page"]
+        created_at = checkpoint["created_at"]
+    else:
+        columns, rows, page = None, 0, 0
+        created_at = time.time()
+
+    os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+    with open(part_path, "a" if checkpoint else "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        for page_data in pages_from(page + 1):
+            if columns is None:
+                columns = _columns(page_data)
+                f.write("\ufeff")
+                writer.writerow(columns + [EXTRA_COLUMN])
+            seen = set(columns)
+            writer.writerows(_csv_row(record, columns, seen) for record in page_data)
+            f.flush()
+            page += 1
+            rows += len(page_data)
+
+            checkpoint = {
+                "key": key, "filename": filename, "columns": columns,
+                "page": page, "rows": rows, "bytes": os.fstat(f.fileno()).st_size, "created_at": created_at,
+            }
+            with open(checkpoint_path + ".tmp", "w", encoding="utf-8") as cf:
+                json.dump(checkpoint, cf, ensure_ascii=False)
+            os.replace(checkpoint_path + ".tmp", checkpoint_path)
+            if on_page:
+                on_page(page, rows)
+
+        if columns is None:
+            # 데이터가 없으면 BOM + 빈 헤더만
+            f.write("\ufeff")
+            writer.writerow([EXTRA_COLUMN])
+
+    os.replace(part_path, path)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    metrics.observe("intra_export_pages", page, buckets=PAGES_BUCKETS)
+    return path, rows
+
+
+def _stream_csv(records, filename):
+    chunks = iter_csv_chunks(records)
+    try:
+        # 첫 조각(헤더)까지 미리 만들어서 초기 실패는 에러 응답으로 돌려줌
+        first_chunk = next(chunks)
+    except ApiError as e:
+        return Response(str(e), status=502)
+
+    def generate():
+        yield first_chunk
+        try:
+            yield from chunks
+        except ApiError as e:
+            # 이미 전송을 시작해서 상태 코드는 못 바꿈 -> 다시 raise해서 chunked 응답을 끝맺지 않고 끊음
+            # (브라우저는 잘린 CSV를 완료된 파일로 저장하지 않고 다운로드 실패로 표시)
+            metrics.inc("intra_export_aborted_total")
+            current_app.logger.error("CSV 스트리밍 중단 (%s): %s", filename, e)
+            raise
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def register_routes(server):
+    """Dash 앱의 Flask 서버에 CSV 스트리밍 라우트 등록"""
+
+    @server.route("/export/csv")
+    def export_csv():
+        """
+        GET /export/csv?handle=<결과 핸들> 또는 /export/csv?endpoint=/v2/users&filter[campus_id]=29
+        - handle: result_store의 결과를 그대로 사용 (미리보기로 받은 페이지 재사용)
+        - endpoint 외의 쿼리 파라미터는 API 파라미터로 그대로 전달
+        - 페이지를 받는 중에도 CSV를 조각 단위로 전송
+        - source=mirror: 미러링 대상(/v2/users, /v2/cursus_users)이면 증분 동기화 후 로컬 미러에서 읽음
+        - expand=1: 결과 핸들의 참조(user / project / campus ...)를 페이지마다 펼쳐서 저장
+        """
+        result = result_store.get(request.args.get("handle"))
+        if result and result.endpoint:
+            records = result.iter_records(retain=False)
+            if request.args.get("expand") == "1":
+                records = chain.from_iterable(expand_pages(result.iter_pages(retain=False)))
+            return _stream_csv(records, export_filename(result.endpoint))
+
+        endpoint = request.args.get("endpoint", "")
+        if not endpoint.startswith("/v2/"):
+            return Response("❌ endpoint 파라미터가 필요합니다. (예: /v2/users)", status=400)
+        params = {
+            k: v for k, v in request.args.items() if k not in ("endpoint", "filename", "source")
+        }
+        filename = request.args.get("filename", "api_data.csv")
+
+        mirror = mirror_for_endpoint(endpoint) if request.args.get("source") == "mirror" else None
+        if mirror:
+            try:
+                mirror.sync(params)
+            except ApiError as e:
+                return Response(str(e), status=502)
+            records = mirror.records(params)
+        else:
+            records = iter_records(endpoint, params=params)
+
+        return _stream_csv(records, filename)
+
+    @server.route("/export/file/<path:filename>")
+    def export_file(filename):
+        """백그라운드 내보내기가 EXPORT_DIR에 저장한 CSV 다운로드"""
+        if not filename.endswith(".csv") or "/" in filename:
+            abort(404)
+        return send_from_directory(EXPORT_DIR, filename, as_attachment=True)
@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api_utils import MAX_PAGE_SIZE, iter_records
+from config import ENTITY_CACHE_DB, FETCH_MAX_WORKERS, RESPONSE_CACHE_DEFAULT_TTL, RESPONSE_CACHE_TTLS
+from metrics import metrics
+from profiling import stage
+from response_cache import endpoint_family
+
+# 펼칠 참조 필드 -> 전체 정보를 가져올 엔드포인트
+# 레코드의 "user": {"id": ...} 같은 중첩 요약(stub), 또는 "campus_id" 같은 id 필드를 찾음
+REFERENCES = {
+    "user": "/v2/users",
+    "corrector": "/v2/users",
+    "project": "/v2/projects",
+    "campus": "/v2/campus",
+    "cursus": "/v2/cursus",
+}
+SQLITE_MAX_VARIABLES = 900  # IN (...) 한 번에 넣을 id 수
+
+
+def reference_id(record, field):
+    """record에서 field가 가리키는 id (중첩 요약의 "id" 또는 "<field>_id", 없으면 None)"""
+    value = record.get(field)
+    if isinstance(value, dict):
+        return value.get("id")
+    return record.get(f"{field}_id")
+
+
+class EntityCache:
+    """
+    (엔드포인트, id) -> 엔티티 전체 JSON (SQLite, 모든 워커가 공유)
+    - 만료 시간은 응답 캐시와 같은 엔드포인트 계열별 TTL 사용
+    """
+
+    def __init__(self, db_path=ENTITY_CACHE_DB, ttls=RESPONSE_CACHE_TTLS, default_ttl=RESPONSE_CACHE_DEFAULT_TTL):
+        self.db_path = db_path
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entities (
+                    endpoint TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (endpoint, id)
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get_many(self, endpoint, ids):
+        """ids 중 캐시에 있는 것만 {id: 엔티티}"""
+        ids = list(ids)
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(ids), SQLITE_MAX_VARIABLES):
+                chunk = ids[i: i + SQLITE_MAX_VARIABLES]
+                rows = conn.execute(
+                    f"SELECT id, data FROM entities WHERE endpoint = ? AND expires_at > ? "
+                    f"AND id IN ({','.join('?' * len(chunk))})",
+                    (endpoint, time.time(), *chunk),
+                )
+                found.update((entity_id, json.loads(data)) for entity_id, data in rows)
+        return found
+
+    def set_many(self, endpoint, entities):
+        expires_at = time.time() + self.ttls.get(endpoint_family(endpoint), self.default_ttl)
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?)",
+                [
+                    (endpoint, entity["id"], expires_at, json.dumps(entity, ensure_ascii=False))
+                    for entity in entities
+                ],
+            )
+
+
+def _fetch_batch(endpoint, ids):
+    """id 최대 100개를 filter[id]=1,2,3 요청 하나로 조회"""
+    params = {"filter[id]": ",".join(map(str, ids)), "per_page": MAX_PAGE_SIZE}
+    return list(iter_records(endpoint, params=params))
+
+
+def resolve(endpoint, ids, cache=None):
+    """
+    id 목록 -> {id: 엔티티}
+    - 엔티티 캐시에 없는 id만 MAX_PAGE_SIZE개씩 묶어 filter[id]로 요청 (묶음끼리는 동시에)
+    - 받은 엔티티는 캐시에 저장 -> 다음 펼치기 / 다른 결과에서 재사용
+    """
+    cache = cache or entity_cache
+    ids = sorted(set(ids))
+    entities = cache.get_many(endpoint, ids)
+    missing = [entity_id for entity_id in ids if entity_id not in entities]
+    metrics.inc("intra_expand_entities_total", len(entities), endpoint=endpoint_family(endpoint), source="cache")
+    if not missing:
+        return entities
+
+    batches = [missing[i: i + MAX_PAGE_SIZE] for i in range(0, len(missing), MAX_PAGE_SIZE)]
+    print(f"🔗 펼치기: {endpoint} {len(missing)}건 -> {len(batches)}개 묶음 요청")
+    with ThreadPoolExecutor(max_workers=min(FETCH_MAX_WORKERS, len(batches))) as executor:
+        fetched = [entity for batch in executor.map(lambda b: _fetch_batch(endpoint, b), batches) for entity in batch]
+    cache.set_many(endpoint, fetched)
+    metrics.inc("intra_expand_entities_total", len(fetched), endpoint=endpoint_family(endpoint), source="api")
+    entities.update((entity["id"], entity) for entity in fetched)
+    return entities
+
+
+def expand_records(records, fields=None, cache=None):
+    """
+    레코드 목록의 참조 필드를 전체 엔티티로 펼친 새 레코드 목록
+    - 필드별로 서로 다른 id만 모아 resolve() -> 엔드포인트마다 (id 수 / 100)번 요청
+    - 펼친 값은 {**요약, **엔티티}로 합쳐서 field 키에 넣음 (평탄화하면 "user.email" 같은 컬럼)
+    - 원본 레코드는 응답 캐시 / 결과 저장소가 공유하므로 수정하지 않고 얕은 복사본을 만듦
+    """
+    records = list(records)
+    fields = [field for field in (fields or REFERENCES) if field in REFERENCES]
+
+    with stage("expand"):
+        lookups = {}
+        for field in fields:
+            ids = {reference_id(record, field) for record in records if isinstance(record, dict)}
+            ids = {entity_id for entity_id in ids if isinstance(entity_id, int)}
+            if ids:
+                lookups[field] = resolve(REFERENCES[field], ids, cache)
+        if not lookups:
+            return records
+
+        expanded = []
+        for record in records:
+            if not isinstance(record, dict):
+                expanded.append(record)
+                continue
+            record = dict(record)
+            for field, entities in lookups.items():
+                entity = entities.get(reference_id(record, field))
+                if entity is not None:
+                    stub = record.get(field)
+                    record[field] = {**stub, **entity} if isinstance(stub, dict) else entity
+            expanded.append(record)
+        return expanded
+
+
+def expand_pages(pages, fields=None, cache=None):
+    """페이지 iterator를 페이지 단위로 펼치며 yield (스트리밍 내보내기용, 이미 받은 엔티티는 캐시에서)"""
+    for page in pages:
+        yield expand_records(page, fields, cache)
+
+
+# 모든 결과가 공유하는 엔티티 캐시
+entity_cache = EntityCache()
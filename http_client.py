@@ -0,0 +1,177 @@
+import atexit
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    HTTP_POOL_SIZE,
+    HTTP_HOST_POOL_SIZES,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_USER_AGENT,
+    RATE_LIMIT_ENABLED,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_STATUSES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_CASSETTE_MODE,
+)
+from cassette import Cassette, CassetteMiss
+from metrics import BYTES_BUCKETS, metrics
+from rate_limiter import RateLimiter
+from response_cache import endpoint_family
+
+
+def parse_host_pool_sizes(spec):
+    """"api.intra.42.fr=20,other.host=4" -> {"api.intra.42.fr": 20, "other.host": 4}"""
+    sizes = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        host, size = item.split("=", 1)
+        sizes[host.strip()] = int(size)
+    return sizes
+
+
+def _retry_after(response, default):
+    """Retry-After 헤더(초) -> float (없거나 날짜 형식이면 default)"""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return default
+
+
+class ApiClient:
+    """
+    모든 API 호출이 공유하는 HTTP 클라이언트
+    - requests.Session + HTTPAdapter 커넥션 풀로 keep-alive 재사용 (매 요청 TLS 핸드셰이크 X)
+    - 기본 User-Agent / 타임아웃 적용
+    - rate_limiter가 있으면 모든 요청을 공유 예산에 맞춰 보냄
+      (페이지 병렬 조회 / 스윕 / 샤드 / 일괄 내보내기의 스레드 풀도 모두 이 클라이언트를 거침
+       -> 풀 크기는 동시성만 정하고, 초당 요청 수는 여기서 제한)
+    - 429 / 5xx / 연결 오류는 max_retries번까지 재시도
+      (429는 Retry-After만큼, 나머지는 지터를 넣은 지수 백오프만큼 기다림)
+    - cassette가 있으면 응답을 기록(record)하거나 실제 요청 대신 기록된 응답을 재생(replay)
+    """
+
+    def __init__(
+        self,
+        pool_size=HTTP_POOL_SIZE,
+        host_pool_sizes=None,
+        timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+        user_agent=HTTP_USER_AGENT,
+        rate_limiter=None,
+        max_retries=HTTP_MAX_RETRIES,
+        retry_statuses=HTTP_RETRY_STATUSES,
+        backoff_base=HTTP_BACKOFF_BASE,
+        backoff_max=HTTP_BACKOFF_MAX,
+        cassette=None,
+    ):
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cassette = cassette
+        self.max_retries = max_retries
+        self.retry_statuses = retry_statuses
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+
+        # 기본 풀 (호스트마다 pool_size개 커넥션 유지)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # 특정 호스트만 풀 크기 따로 지정
+        for host, size in (host_pool_sizes or {}).items():
+            self.mount_host(host, size)
+
+    def mount_host(self, host, pool_size):
+        host_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount(f"https://{host}", host_adapter)
+        self.session.mount(f"http://{host}", host_adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                response = self._send(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if isinstance(e, CassetteMiss) or attempt == self.max_retries:
+                    raise
+                reason, delay = type(e).__name__, self._backoff(attempt)
+            else:
+                if self.rate_limiter:
+                    self.rate_limiter.update_from_response(response)
+                if response.status_code not in self.retry_statuses or attempt == self.max_retries:
+                    return response
+                reason, delay = str(response.status_code), self._backoff(attempt)
+                if response.status_code == 429:
+                    # rate limiter가 있으면 다음 acquire()가 Retry-After 만큼 기다려줌
+                    delay = 0.0 if self.rate_limiter else _retry_after(response, delay)
+
+            metrics.inc("intra_upstream_retries_total", endpoint=endpoint_family(urlparse(url).path), reason=reason)
+            print(f"⏳ 재시도 {attempt + 1}/{self.max_retries} ({reason}, {delay:.1f}초 후): {url}")
+            time.sleep(delay)
+
+    def _backoff(self, attempt):
+        """full jitter: 0 ~ min(max, base * 2^attempt) 사이 무작위 (여러 워커가 동시에 다시 몰리지 않도록)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _send(self, method, url, **kwargs):
+        """실제 HTTP 요청 한 번 (지연 시간 / 상태 코드 / 응답 크기를 엔드포인트 계열별로 기록)"""
+        family = endpoint_family(urlparse(url).path)
+        started = time.perf_counter()
+        try:
+            if self.cassette and self.cassette.mode == "replay":
+                response = self.cassette.replay(method, url, kwargs.get("params"))
+            else:
+                response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            metrics.inc("intra_upstream_errors_total", endpoint=family)
+            raise
+        elapsed = time.perf_counter() - started
+        if self.cassette and self.cassette.mode == "record":
+            self.cassette.record(method, url, kwargs.get("params"), response, elapsed)
+        metrics.observe("intra_upstream_request_seconds", elapsed, endpoint=family)
+        metrics.observe("intra_upstream_response_bytes", len(response.content), buckets=BYTES_BUCKETS, endpoint=family)
+        metrics.inc("intra_upstream_requests_total", endpoint=family, status=response.status_code)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """프로세스 전체에서 하나의 ApiClient만 사용"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                cassette = Cassette() if HTTP_CASSETTE_MODE != "off" else None
+                replaying = cassette is not None and cassette.mode == "replay"
+                _client = ApiClient(
+                    host_pool_sizes=parse_host_pool_sizes(HTTP_HOST_POOL_SIZES),
+                    # 재생할 때는 실제 API 예산을 쓰지 않으므로 속도 제한 없음 (지연은 HTTP_REPLAY_LATENCY로)
+                    rate_limiter=RateLimiter() if RATE_LIMIT_ENABLED and not replaying else None,
+                    cassette=cassette,
+                )
+                if cassette:
+                    atexit.register(cassette.close)
+    return _client
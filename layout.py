@@ -19,7 +19,7 @@ def create_layout():
         # API 요청을 위한 입력 필드 동적 생성 영역
         html.Div(id="dynamic-inputs", style={"margin-top": "20px"}),
 
-        # 선택한 API 엔드포인트를 저장하는 숨겨진 Store
+        # 선택한 API의 결과 핸들을 저장하는 숨겨진 Store (결과 자체는 서버의 result_store에)
         dcc.Store(id="selected-endpoint", data=""),
 
         # "📡 API 요청 보내기" 버튼 (인자가 필요한 경우에만 표시)
@@ -28,19 +28,62 @@ def create_layout():
 
         html.Hr(),
 
+        # 결과 표시 방식: 첫 10개 미리보기 / 전체를 서버에서 페이지 단위로 탐색
+        dcc.RadioItems(
+            id="table-mode",
+            options=[
+                {"label": "미리보기 (첫 10개)", "value": "preview"},
+                {"label": "전체 탐색 (서버 페이징 / 정렬 / 필터)", "value": "server"},
+            ],
+            value="preview",
+            inline=True,
+        ),
+
+        # 참조 필드(user / project / campus ...)를 묶음 요청으로 전체 정보까지 펼쳐서 표시 / 저장
+        dcc.Checklist(
+            id="expand-related",
+            options=[{"label": "🔗 연관 항목 펼치기 (user / project / campus / cursus)", "value": "expand"}],
+            value=[],
+            inline=True,
+        ),
+
         # API 응답 출력 (첫 번째 페이지만 표시)
         html.Div(id="api-response-table", style={"margin-top": "20px"}),
 
-        # "📥 CSV로 저장" 버튼 (첫 페이지 요청 후 표시)
-        html.Button("📥 CSV로 저장", id="save-csv", n_clicks=0,
-                    style={"margin-top": "10px", "display": "none"}),
+        # "📥 CSV로 저장" 링크 (첫 페이지 요청 후 표시)
+        # /export/csv 라우트가 페이지를 받는 대로 CSV를 스트리밍
+        html.A(
+            html.Button("📥 CSV로 저장", n_clicks=0),
+            id="save-csv",
+            href="",
+            download="api_data.csv",
+            style={"margin-top": "10px", "display": "none"},
+        ),
 
-        # CSV 다운로드 링크를 dcc.Loading으로 감싸서 진행 중 상태 표시
-        dcc.Loading(
-            id="download-loading",
-            type="default",
-            custom_spinner=html.Div("다운로드중..."),
-            children=[dcc.Download(id="download-dataframe-csv")],
-            style={"margin-top": "10px"}
+        # 백그라운드 전체 내보내기 (서버에 CSV 저장, 진행률 표시 / 취소 가능)
+        html.Div(
+            id="export-panel",
+            children=[
+                html.Button("🗂 백그라운드로 전체 내보내기", id="export-start", n_clicks=0),
+                html.Button("⏹ 취소", id="export-cancel", n_clicks=0, style={"display": "none"}),
+                html.Progress(id="export-progress", value="0", max="1", style={"margin-left": "10px"}),
+                html.Span(id="export-progress-text", style={"margin-left": "10px"}),
+                html.Div(id="export-status", style={"margin-top": "5px"}),
+            ],
+            style={"margin-top": "10px", "display": "none"},
         ),
+
+        html.Hr(),
+
+        # 예약 작업으로 미리 계산된 데이터 (jobs.json) -> 마지막 성공 시각 / 다음 실행 / 다운로드 링크
+        html.H3("📅 미리 계산된 데이터"),
+        html.Div(id="jobs-panel"),
+        dcc.Interval(id="jobs-refresh", interval=60 * 1000),
+
+        # 운영 지표 (/metrics와 같은 값을 요약, 열어둔 동안 10초마다 갱신)
+        html.Details([
+            html.Summary("🛠 운영 지표"),
+            html.Div(id="ops-panel"),
+            dcc.Interval(id="ops-refresh", interval=10 * 1000),
+        ], style={"margin-top": "20px"}),
     ])
@@ -0,0 +1,24 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl  # 프로세스 간 파일 락 (Linux / macOS)
+except ImportError:  # Windows에서는 스레드 락만 사용
+    fcntl = None
+
+
+@contextmanager
+def file_lock(lock_path):
+    """
+    lock_path 파일에 배타적 락을 잡음
+    - 같은 파일을 쓰는 Dash 워커 / CLI 스크립트끼리 직렬화하는 용도 (토큰 캐시, 예약 작업 등)
+    """
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,162 @@
+import bisect
+import re
+import threading
+import time
+
+from flask import Response, g, request
+
+# 히스토그램 버킷 (Prometheus le 경계)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+PAGES_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+# 이름 -> (종류, 설명)
+METRICS = {
+    "intra_upstream_requests_total": ("counter", "42 API로 보낸 HTTP 요청 수 (상태 코드별)"),
+    "intra_upstream_request_seconds": ("histogram", "42 API 요청 지연 시간"),
+    "intra_upstream_response_bytes": ("histogram", "42 API 응답 본문 크기"),
+    "intra_upstream_retries_total": ("counter", "429 / 5xx / 연결 오류 후 재시도한 횟수"),
+    "intra_upstream_errors_total": ("counter", "연결 / 타임아웃 등으로 응답을 못 받은 요청 수"),
+    "intra_callback_seconds": ("histogram", "Dash 콜백 처리 시간"),
+    "intra_callback_errors_total": ("counter", "5xx로 끝난 Dash 콜백 수"),
+    "intra_export_pages": ("histogram", "CSV 내보내기 한 번에 받은 페이지 수 (100건 기준)"),
+    "intra_export_aborted_total": ("counter", "전송 중에 API 오류로 끊긴 CSV 스트리밍 수"),
+    "intra_ratelimit_headroom": ("gauge", "rate limiter 버킷별 남은 요청 수"),
+    "intra_cache_hit_ratio": ("gauge", "응답 캐시 적중률"),
+    "intra_cache_entries": ("gauge", "응답 캐시 메모리 항목 수"),
+    "intra_singleflight_coalesced_total": ("counter", "진행 중인 같은 요청에 합쳐진 요청 수"),
+    "intra_token_hit_ratio": ("gauge", "액세스 토큰 캐시 적중률"),
+    "intra_expand_entities_total": ("counter", "연관 항목 펼치기로 찾은 엔티티 수 (캐시 / API)"),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Metrics:
+    """
+    프로세스 내 카운터 / 히스토그램 저장소 + Prometheus 텍스트 형식 출력
+    - 요청 처리 중에는 inc() / observe()로 숫자만 더함 (락 하나, 할당 거의 없음)
+    - 캐시 / rate limiter처럼 이미 통계를 가진 객체는 add_collector()로 등록해 /metrics 요청 때만 읽음
+    - 값은 워커 프로세스마다 따로 (백그라운드 콜백 프로세스에서 생긴 요청은 포함 안 됨)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [버킷별 개수..., sum, count]
+        self._buckets = {}  # name -> 버킷 경계
+        self._collectors = []
+        self.started_at = time.time()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [0] * (len(buckets) + 2)
+                self._buckets[name] = buckets
+            if index < len(buckets):
+                hist[index] += 1
+            hist[-2] += value
+            hist[-1] += 1
+
+    def add_collector(self, collector):
+        """collector() -> [(이름, labels dict, 값), ...] (/metrics 요청 때마다 호출)"""
+        self._collectors.append(collector)
+
+    def collect(self):
+        """현재 값 전체 -> (counters, histograms, 버킷 경계, gauges) 복사본"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(hist) for key, hist in self._histograms.items()}
+            buckets = dict(self._buckets)
+        gauges = {}
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception as e:  # 통계 하나 못 읽어도 나머지는 보여줌
+                print(f"⚠️ 지표 수집 실패: {e}")
+                continue
+            for name, labels, value in samples:
+                gauges[(name, _label_key(labels))] = value
+        return counters, histograms, buckets, gauges
+
+    def render(self):
+        """Prometheus 텍스트 노출 형식 (text/plain; version=0.0.4)"""
+        counters, histograms, buckets, gauges = self.collect()
+        by_name = {}
+        for (name, labels), value in counters.items():
+            by_name.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in gauges.items():
+            by_name.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), hist in histograms.items():
+            lines = by_name.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(buckets[name], hist):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {hist[-1]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist[-2]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist[-1]}")
+
+        output = []
+        for name in sorted(by_name):
+            kind, help_text = METRICS.get(name, ("untyped", ""))
+            output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(by_name[name])
+        return "\n".join(output) + "\n"
+
+
+# 프로세스 전체가 공유하는 지표 저장소
+metrics = Metrics()
+
+
+def callback_name(payload):
+    """Dash 콜백 요청 본문 -> 콜백 이름 (패턴 ID의 index는 핸들 등이라 *로 합침)"""
+    output = (payload or {}).get("output", "unknown")
+    return re.sub(r'"index":("[^"]*"|[^,}]*)', '"index":*', output)
+
+
+def register_routes(server):
+    """
+    Flask 서버에 지표 수집 훅과 /metrics 라우트 등록
+    - 모든 Dash 콜백은 /_dash-update-component 요청 하나 -> 요청 시간을 콜백 이름별로 기록
+    """
+
+    @server.before_request
+    def start_callback_timer():
+        if request.path.endswith("/_dash-update-component"):
+            g.callback_started = time.perf_counter()
+
+    @server.after_request
+    def record_callback(response):
+        started = g.pop("callback_started", None)
+        if started is not None:
+            name = callback_name(request.get_json(silent=True))
+            metrics.observe("intra_callback_seconds", time.perf_counter() - started, callback=name)
+            if response.status_code >= 500:
+                metrics.inc("intra_callback_errors_total", callback=name)
+        return response
+
+    @server.route("/metrics")
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
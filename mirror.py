@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+from api_utils import MAX_PAGE_SIZE, iter_pages
+from config import MIRROR_DIR
+
+# 미러링할 리소스 -> API 엔드포인트
+MIRROR_RESOURCES = {
+    "cursus_users": "/v2/cursus_users",
+    "users": "/v2/users",
+}
+
+
+def _after(timestamp):
+    """"2024-06-01T00:00:01.000Z" -> 1ms 뒤 시각 (같은 형식)"""
+    moment = datetime.fromisoformat(timestamp.replace("Z", "+00:00")) + timedelta(milliseconds=1)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def filter_key(filters):
+    """쿼리 필터 dict -> 동기화 상태를 구분하는 키 (순서 무관)"""
+    return json.dumps(sorted((filters or {}).items()), ensure_ascii=False)
+
+
+class Mirror:
+    """
+    42 intra 리소스 하나의 로컬 SQLite 미러
+    - records: id 기준 upsert (최신 레코드 한 벌만 유지)
+    - members: 어떤 필터로 동기화했을 때 들어온 레코드인지
+    - sync_state: 필터별 high-water mark (가장 최근 updated_at)
+    sync()는 high-water mark 이후에 바뀐 레코드만 range[updated_at]으로 받아옴
+    """
+
+    def __init__(self, resource, mirror_dir=MIRROR_DIR):
+        if resource not in MIRROR_RESOURCES:
+            raise ValueError(f"미러링을 지원하지 않는 리소스: {resource}")
+        self.resource = resource
+        self.endpoint = MIRROR_RESOURCES[resource]
+        os.makedirs(mirror_dir, exist_ok=True)
+        self.db_path = os.path.join(mirror_dir, f"{resource}.sqlite3")
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, updated_at TEXT, data TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS members (filter_key TEXT, id INTEGER, PRIMARY KEY (filter_key, id))"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    filter_key TEXT PRIMARY KEY,
+                    high_water TEXT,
+                    synced_at REAL
+                )
+                """
+            )
+
+    def high_water(self, filters=None):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT high_water FROM sync_state WHERE filter_key = ?", (filter_key(filters),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def synced_at(self, filters=None):
+        """마지막 동기화 시각 (unix time, 한 번도 안 했으면 None)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT synced_at FROM sync_state WHERE filter_key = ?", (filter_key(filters),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def sync(self, filters=None):
+        """
+        filters 조건으로 증분 동기화 -> upsert한 레코드 수 반환
+        - updated_at 오름차순으로 한 페이지씩 받고, 다음 페이지는 page 번호 대신
+          range[updated_at]=<지금까지 본 마지막 updated_at>,... 의 첫 페이지로 다시 요청 (keyset 방식)
+          -> 동기화 중에 바뀐 레코드가 뒤로 옮겨가도 페이지 경계에서 레코드를 건너뛰지 않음
+        - 그래서 페이지를 저장할 때마다 high-water mark를 올려도 안전 (중간에 실패해도 다음 sync가 이어서 받음)
+        - 한 페이지 전체가 같은 updated_at이면 그 시각만 따로 끝까지 받은 뒤 1ms 뒤부터 이어감
+        """
+        key = filter_key(filters)
+        high_water = self.high_water(filters)
+        until = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        base_params = dict(filters or {})
+        base_params["sort"] = "updated_at"
+        base_params["per_page"] = MAX_PAGE_SIZE
+
+        def range_params(start, end=until):
+            # 경계값과 같은 레코드는 다시 받아도 upsert라 문제없음
+            return {**base_params, "range[updated_at]": f"{start},{end}"} if start else dict(base_params)
+
+        print(f"🔄 {self.resource} 동기화 시작 (기준: {high_water or '전체'})")
+        upserted = 0
+        anchor = high_water
+        while True:
+            page_data = next(iter_pages(self.endpoint, params=range_params(anchor), max_pages=1, use_cache=False), [])
+            page_high = self._store(key, page_data)
+            upserted += len(page_data)
+            if len(page_data) < MAX_PAGE_SIZE or not page_high:
+                if page_high and (not anchor or page_high > anchor):
+                    anchor = page_high
+                break
+            if page_high == anchor:
+                # 같은 시각의 레코드가 한 페이지를 넘음 -> 그 시각만 페이지 번호로 끝까지 받고 넘어감
+                same_pages = iter_pages(self.endpoint, params=range_params(anchor, anchor), start_page=2, use_cache=False)
+                for same_page in same_pages:
+                    self._store(key, same_page)
+                    upserted += len(same_page)
+                page_high = _after(anchor)
+            anchor = page_high
+            self._save_high_water(key, anchor)
+
+        # 바뀐 레코드가 없어도 동기화 시각은 갱신
+        self._save_high_water(key, anchor)
+        print(f"✅ {self.resource} 동기화 완료: {upserted}건 갱신")
+        return upserted
+
+    def _store(self, key, page_data):
+        """페이지 레코드 upsert -> 페이지에서 가장 최근 updated_at (없으면 None)"""
+        rows = [
+            (item["id"], item.get("updated_at"), json.dumps(item, ensure_ascii=False))
+            for item in page_data
+            if isinstance(item, dict) and "id" in item
+        ]
+        if not rows:
+            return None
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?)", rows)
+            conn.executemany("INSERT OR IGNORE INTO members VALUES (?, ?)", [(key, r[0]) for r in rows])
+        return max((r[1] for r in rows if r[1]), default=None)
+
+    def _save_high_water(self, key, high_water):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)", (key, high_water, time.time()))
+
+    def records(self, filters=None):
+        """filters로 동기화된 레코드를 id 순서대로 하나씩 yield"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                """
+                SELECT r.data FROM records r
+                JOIN members m ON m.id = r.id
+                WHERE m.filter_key = ?
+                ORDER BY r.id
+                """,
+                (filter_key(filters),),
+            )
+            for (data,) in cursor:
+                yield json.loads(data)
+        finally:
+            conn.close()
+
+
+def mirror_for_endpoint(endpoint):
+    """엔드포인트가 미러링 대상이면 Mirror, 아니면 None"""
+    for resource, resource_endpoint in MIRROR_RESOURCES.items():
+        if endpoint == resource_endpoint:
+            return Mirror(resource)
+    return None
+
+
+if __name__ == "__main__":
+    # 예: python mirror.py cursus_users filter[campus_id]=29
+    parser = argparse.ArgumentParser(description="42 intra 리소스 로컬 미러 동기화")
+    parser.add_argument("resource", choices=sorted(MIRROR_RESOURCES))
+    parser.add_argument("filters", nargs="*", help="key=value 형식의 API 필터")
+    args = parser.parse_args()
+
+    filters = dict(f.split("=", 1) for f in args.filters)
+    Mirror(args.resource).sync(filters)
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import deque
+
+import requests
+
+from api_utils import ApiError, fetch_total, response_cache
+from config import PREFETCH_ENABLED, PREFETCH_MAX_ENDPOINTS, PREFETCH_HOURLY_RESERVE
+from http_client import get_client
+
+
+def is_parameterless(endpoint):
+    """":id" 같은 경로 인자나 "(...)" 선택 구간이 없는 엔드포인트인지"""
+    return ":" not in endpoint and "(" not in endpoint
+
+
+class Prefetcher:
+    """
+    카테고리를 고르면 그 카테고리의 파라미터 없는 API 첫 페이지를 백그라운드에서 미리 요청
+    - 미리보기와 같은 (per_page=MAX_PAGE_SIZE, page=1) 요청이라 버튼을 누르면 응답 캐시에서 바로 나옴
+    - 스레드 하나가 순서대로 처리 -> 사용자 요청과 rate limiter 예산을 나눠 써도 한 번에 한 요청만 차지
+    - 초당 예산이 비어 있으면 채워질 때까지 양보, 시간당 예산이 hourly_reserve 아래면 건너뜀
+    - 다른 카테고리를 고르면 아직 시작 안 한 이전 카테고리 요청은 버림
+    """
+
+    def __init__(self, max_endpoints=PREFETCH_MAX_ENDPOINTS, hourly_reserve=PREFETCH_HOURLY_RESERVE):
+        self.max_endpoints = max_endpoints
+        self.hourly_reserve = hourly_reserve
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats = {"queued": 0, "fetched": 0, "skipped": 0, "failed": 0}
+
+    def prefetch(self, endpoints):
+        endpoints = [ep for ep in endpoints if is_parameterless(ep)][: self.max_endpoints]
+        with self._cond:
+            self._queue.clear()
+            self._queue.extend(endpoints)
+            self._stats["queued"] += len(endpoints)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._queue)
+        return stats
+
+    def _count(self, key):
+        with self._cond:
+            self._stats[key] += 1
+
+    def _has_budget(self):
+        rate_limiter = get_client().rate_limiter
+        if not rate_limiter:
+            return True
+        headroom = rate_limiter.headroom()
+        if headroom.get("hourly", self.hourly_reserve) < self.hourly_reserve:
+            return False
+        # 초당 예산은 사용자 요청이 먼저 쓰도록 한 칸 이상 남을 때까지 대기
+        while rate_limiter.headroom().get("secondly", 1) < 1:
+            time.sleep(0.5)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                endpoint = self._queue.popleft()
+
+            if not self._has_budget():
+                self._count("skipped")
+                continue
+            try:
+                fetch_total(endpoint)  # 첫 페이지만 요청 -> 응답 캐시에 저장
+                self._count("fetched")
+            except (ApiError, requests.RequestException) as e:
+                print(f"⚠️ 미리 받기 실패 ({endpoint}): {e}")
+                self._count("failed")
+
+
+# 응답 캐시가 꺼져 있으면 미리 받아도 남지 않으므로 사용 안 함
+prefetcher = Prefetcher() if PREFETCH_ENABLED and response_cache else None
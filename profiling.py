@@ -0,0 +1,218 @@
+import argparse
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+from flask import g, request
+
+from config import PROFILE_DIR, PROFILE_ENABLED, PROFILE_MEMORY, PROFILE_SAMPLE_RATE
+from metrics import callback_name
+
+STAGES_LOG = "stages.jsonl"  # 요청별 단계 시간을 한 줄씩 쌓는 파일 (버전 간 비교용)
+PROFILE_COOKIE = "profile"
+
+# 지금 스레드(요청)에서 진행 중인 프로파일 (없으면 stage()는 아무것도 안 함)
+_current = contextvars.ContextVar("profile_session", default=None)
+# tracemalloc은 프로세스 전역이라 한 번에 한 요청만 메모리를 잼
+_memory_lock = threading.Lock()
+
+
+class ProfileSession:
+    """
+    요청 하나의 프로파일
+    - cProfile: 요청을 처리한 스레드의 함수별 시간 -> <이름>.prof (pstats / snakeviz로 열기)
+    - stage(): 단계별(fetch / flatten / dataframe / transpose / callback ...) 합계 시간과 횟수
+      (페이지 병렬 요청처럼 스레드 풀에서 도는 단계는 시간이 겹쳐서 합계가 전체보다 클 수 있음)
+    - memory=True면 tracemalloc으로 최대 메모리와 할당이 많은 위치 상위 10개
+    """
+
+    def __init__(self, name, memory=PROFILE_MEMORY):
+        self.name = name
+        self.memory = memory
+        self.stages = {}  # 단계 이름 -> [초, 횟수]
+        self._lock = threading.Lock()
+        self._profiler = cProfile.Profile()
+        self._token = None
+        self._tracing_memory = False
+
+    def add(self, stage_name, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(stage_name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def start(self):
+        self._token = _current.set(self)
+        if self.memory and _memory_lock.acquire(blocking=False):
+            self._tracing_memory = True
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        self._profiler.enable()
+
+    def stop(self, profile_dir=PROFILE_DIR):
+        """프로파일 종료 -> .prof / .json 저장, 단계 시간은 stages.jsonl에 추가, 요약 dict 반환"""
+        self._profiler.disable()
+        total = time.perf_counter() - self._started
+        _current.reset(self._token)
+
+        summary = {
+            "name": self.name,
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_seconds": total,
+            "stages": {name: {"seconds": s, "count": c} for name, (s, c) in self.stages.items()},
+        }
+        if "callback" in self.stages:
+            # 콜백 함수 밖에서 쓴 시간 (Dash의 인자 처리 + 응답 JSON 직렬화)
+            summary["stages"]["serialize"] = {"seconds": max(0.0, total - self.stages["callback"][0]), "count": 1}
+        if self._tracing_memory:
+            snapshot = tracemalloc.take_snapshot()
+            summary["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+            summary["top_allocations"] = [
+                {"where": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:10]
+            ]
+            tracemalloc.stop()
+            _memory_lock.release()
+
+        os.makedirs(profile_dir, exist_ok=True)
+        slug = re.sub(r"[^0-9A-Za-z]+", "_", self.name).strip("_")[:60]
+        base = os.path.join(profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{slug}_{uuid.uuid4().hex[:6]}")
+        self._profiler.dump_stats(base + ".prof")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        with open(os.path.join(profile_dir, STAGES_LOG), "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary | {"top_allocations": None}, ensure_ascii=False) + "\n")
+        return summary
+
+
+@contextmanager
+def stage(name):
+    """진행 중인 프로파일이 있으면 with 블록 시간을 name 단계에 더함"""
+    session = _current.get()
+    if session is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        session.add(name, time.perf_counter() - started)
+
+
+def timed(name):
+    """함수 전체를 stage(name)으로 감싸는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile(name, memory=PROFILE_MEMORY):
+    """스크립트용: with profile("export"): ... -> 블록 전체를 프로파일해서 PROFILE_DIR에 저장"""
+    session = ProfileSession(name, memory)
+    session.start()
+    try:
+        yield session
+    finally:
+        summary = session.stop()
+        print(f"🔬 프로파일 저장: {name} ({summary['total_seconds']:.2f}초)")
+
+
+class _TimedCallbacks:
+    """app.callback으로 등록하는 콜백 함수를 stage("callback")으로 감싸는 app 대리 객체"""
+
+    def __init__(self, app):
+        self._app = app
+
+    def __getattr__(self, name):
+        return getattr(self._app, name)
+
+    def callback(self, *args, **kwargs):
+        register = self._app.callback(*args, **kwargs)
+        if kwargs.get("background"):
+            # 백그라운드 콜백은 다른 프로세스에서 실행되므로 그대로 등록
+            return register
+        return lambda func: register(timed("callback")(func))
+
+
+def instrument_callbacks(app):
+    return _TimedCallbacks(app)
+
+
+def _wants_profile():
+    if request.headers.get("X-Profile") == "1" or request.cookies.get(PROFILE_COOKIE) == "1":
+        return True
+    return PROFILE_ENABLED and random.random() < PROFILE_SAMPLE_RATE
+
+
+def register_routes(server):
+    """
+    Dash 콜백 요청(/_dash-update-component)을 프로파일하는 Flask 훅
+    - PROFILE_ENABLED=1: PROFILE_SAMPLE_RATE 비율만큼 샘플링
+    - 요청 단위: X-Profile: 1 헤더, 또는 페이지를 ?profile=1로 열면 쿠키가 켜짐 (?profile=0으로 끔)
+    """
+
+    @server.before_request
+    def start_profile():
+        if request.path.endswith("/_dash-update-component") and _wants_profile():
+            g.profile_session = ProfileSession(callback_name(request.get_json(silent=True)))
+            g.profile_session.start()
+
+    @server.after_request
+    def remember_profile_choice(response):
+        choice = request.args.get("profile")
+        if choice in ("0", "1"):
+            response.set_cookie(PROFILE_COOKIE, choice, samesite="Lax")
+        return response
+
+    @server.teardown_request
+    def stop_profile(exc):
+        session = g.pop("profile_session", None)
+        if session is not None:
+            session.stop()
+
+
+def summarize(profile_dir=PROFILE_DIR, last=None):
+    """stages.jsonl -> 이름별 단계 평균 시간 {name: {stage: 평균 초}}"""
+    path = os.path.join(profile_dir, STAGES_LOG)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    if last:
+        entries = entries[-last:]
+
+    totals = {}
+    for entry in entries:
+        stages = totals.setdefault(entry["name"], {})
+        for stage_name, value in {**entry["stages"], "total": {"seconds": entry["total_seconds"]}}.items():
+            stages.setdefault(stage_name, []).append(value["seconds"])
+    return {
+        name: {stage_name: sum(values) / len(values) for stage_name, values in stages.items()}
+        for name, stages in totals.items()
+    }
+
+
+if __name__ == "__main__":
+    # 예: python profiling.py --last 200
+    parser = argparse.ArgumentParser(description="프로파일 단계별 평균 시간 요약")
+    parser.add_argument("--last", type=int, help="최근 N개 요청만")
+    args = parser.parse_args()
+
+    for name, stages in summarize(last=args.last).items():
+        print(f"📊 {name}")
+        for stage_name, seconds in sorted(stages.items(), key=lambda item: -item[1]):
+            print(f"    {stage_name:<12} {seconds * 1000:9.1f} ms")
@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import threading
+import time
+
+from config import RATE_LIMIT_DB, RATE_LIMIT_PER_SECOND, RATE_LIMIT_PER_HOUR
+
+# (버킷 이름, 응답 헤더 접두어, 기간(초))
+BUCKETS = (
+    ("secondly", "X-Secondly-RateLimit", 1.0),
+    ("hourly", "X-Hourly-RateLimit", 3600.0),
+)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    42 API 속도 제한에 맞춘 토큰 버킷 스케줄러
+    - 초당 / 시간당 버킷 두 개를 SQLite 장부에 저장 -> 모든 스레드와 프로세스가 하나의 예산을 공유
+    - 요청 전 acquire()로 토큰을 하나 꺼내고, 부족하면 채워질 때까지 대기
+    - 응답의 X-*-RateLimit-Limit / -Remaining 으로 버킷을 서버 값에 맞추고,
+      Retry-After가 오면 그 시각까지 모든 요청을 멈춤
+    """
+
+    def __init__(self, db_path=RATE_LIMIT_DB, per_second=RATE_LIMIT_PER_SECOND, per_hour=RATE_LIMIT_PER_HOUR):
+        self.db_path = db_path
+        self.defaults = {"secondly": per_second, "hourly": per_hour}
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "throttled": 0}
+        self._init_db()
+
+    def _conn(self):
+        # sqlite3 커넥션은 스레드마다 따로
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                capacity REAL NOT NULL,
+                period REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        now = time.time()
+        for name, _, period in BUCKETS:
+            capacity = self.defaults[name]
+            conn.execute(
+                "INSERT OR IGNORE INTO buckets VALUES (?, ?, ?, ?, ?, 0)",
+                (name, capacity, capacity, period, now),
+            )
+
+    def acquire(self):
+        """토큰 하나를 꺼낼 때까지 대기 (대기한 시간을 반환)"""
+        waited = 0.0
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+
+        with self._stats_lock:
+            self._stats["acquired"] += 1
+            if waited:
+                self._stats["waited"] += 1
+                self._stats["wait_seconds"] += waited
+        return waited
+
+    def _try_acquire(self):
+        """가능하면 토큰을 소비하고 0, 아니면 기다려야 할 초를 반환"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            rows = conn.execute(
+                "SELECT name, tokens, capacity, period, updated_at, blocked_until FROM buckets"
+            ).fetchall()
+
+            wait = 0.0
+            refilled = {}
+            for name, tokens, capacity, period, updated_at, blocked_until in rows:
+                tokens = min(capacity, tokens + (now - updated_at) * capacity / period)
+                refilled[name] = tokens
+                if blocked_until > now:
+                    wait = max(wait, blocked_until - now)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) * period / capacity)
+
+            for name, tokens in refilled.items():
+                if wait <= 0:
+                    tokens -= 1
+                conn.execute(
+                    "UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?",
+                    (tokens, now, name),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def update_from_response(self, response):
+        """응답 헤더로 버킷 보정 (Limit -> 용량, Remaining -> 남은 토큰 상한)"""
+        headers = response.headers
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            for name, prefix, period in BUCKETS:
+                limit = _to_float(headers.get(f"{prefix}-Limit"))
+                remaining = _to_float(headers.get(f"{prefix}-Remaining"))
+                if limit:
+                    conn.execute("UPDATE buckets SET capacity = ? WHERE name = ?", (limit, name))
+                if remaining is not None:
+                    conn.execute(
+                        "UPDATE buckets SET tokens = MIN(tokens, ?) WHERE name = ?",
+                        (remaining, name),
+                    )
+
+            retry_after = headers.get("Retry-After")
+            if response.status_code == 429 or retry_after:
+                # Retry-After가 없거나 날짜 형식이면 1초
+                delay = _to_float(retry_after) or 1.0
+                conn.execute(
+                    "UPDATE buckets SET blocked_until = MAX(blocked_until, ?)",
+                    (now + delay,),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if response.status_code == 429:
+            with self._stats_lock:
+                self._stats["throttled"] += 1
+
+    def headroom(self):
+        """버킷별 현재 남은 토큰 수 (보충분 포함)"""
+        now = time.time()
+        rows = self._conn().execute(
+            "SELECT name, tokens, capacity, period, updated_at FROM buckets"
+        ).fetchall()
+        return {
+            name: min(capacity, tokens + (now - updated_at) * capacity / period)
+            for name, tokens, capacity, period, updated_at in rows
+        }
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
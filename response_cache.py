@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from config import (
+    RESPONSE_CACHE_DB,
+    RESPONSE_CACHE_MEMORY_BYTES,
+    RESPONSE_CACHE_DISK_BYTES,
+    RESPONSE_CACHE_DEFAULT_TTL,
+    RESPONSE_CACHE_TTLS,
+)
+
+EVICT_EVERY = 50  # 디스크 크기 점검 주기 (저장 횟수)
+
+
+def endpoint_family(endpoint):
+    """
+    TTL을 정하는 엔드포인트 계열 = 경로에서 숫자가 아닌 마지막 조각
+    예: /v2/users/123/locations -> "locations", /v2/users/123 -> "users"
+    """
+    segments = [s for s in endpoint.split("?")[0].split("/") if s and not s.isdigit()]
+    return segments[-1] if segments else ""
+
+
+def make_key(endpoint, params, page):
+    raw = json.dumps([endpoint, sorted((params or {}).items()), page], ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    (endpoint, params, page) -> 페이지 응답 캐시
+    - 1단계: 프로세스 메모리 LRU (memory_bytes 초과 시 오래 안 쓴 것부터 제거)
+    - 2단계: 디스크 SQLite (모든 워커가 공유, disk_bytes 초과 시 오래 안 쓴 것부터 제거)
+    - TTL은 엔드포인트 계열별로 다르게 (사용자 위치는 짧게, 캠퍼스/커리큘럼은 길게)
+    """
+
+    def __init__(
+        self,
+        db_path=RESPONSE_CACHE_DB,
+        memory_bytes=RESPONSE_CACHE_MEMORY_BYTES,
+        disk_bytes=RESPONSE_CACHE_DISK_BYTES,
+        ttls=RESPONSE_CACHE_TTLS,
+        default_ttl=RESPONSE_CACHE_DEFAULT_TTL,
+    ):
+        self.db_path = db_path
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self._memory = OrderedDict()  # key -> (expires_at, size, value)
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._sets = 0
+        self._init_db()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                value BLOB NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def ttl_for(self, endpoint):
+        return self.ttls.get(endpoint_family(endpoint), self.default_ttl)
+
+    def get(self, key):
+        now = time.time()
+
+        # 1) 메모리
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[2]
+            if entry:
+                self._drop_memory(key)
+
+        # 2) 디스크
+        row = self._conn().execute(
+            "SELECT expires_at, value FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row and row[0] > now:
+            self._conn().execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            raw = zlib.decompress(row[1])
+            value = json.loads(raw)
+            self._put_memory(key, row[0], len(raw), value)
+            with self._lock:
+                self._stats["disk_hits"] += 1
+            return value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key, endpoint, value):
+        now = time.time()
+        expires_at = now + self.ttl_for(endpoint)
+        raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        blob = zlib.compress(raw)
+        self._put_memory(key, expires_at, len(raw), value)
+
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (key, endpoint, expires_at, now, len(blob), blob),
+        )
+        # 전체 크기 계산은 비싸므로 EVICT_EVERY번 저장할 때마다 한 번
+        with self._lock:
+            self._sets += 1
+            due = self._sets % EVICT_EVERY == 0
+        if due:
+            self._evict_disk()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+        self._conn().execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_size
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_ratio"] = hits / total if total else 0.0
+        return stats
+
+    def _put_memory(self, key, expires_at, size, value):
+        # size는 JSON 직렬화 크기 기준 (실제 파이썬 객체 크기의 근사치)
+        with self._lock:
+            if key in self._memory:
+                self._drop_memory(key)
+            self._memory[key] = (expires_at, size, value)
+            self._memory_size += size
+            while self._memory_size > self.memory_bytes and len(self._memory) > 1:
+                oldest = next(iter(self._memory))
+                self._drop_memory(oldest)
+                self._stats["evictions"] += 1
+
+    def _drop_memory(self, key):
+        _, size, _ = self._memory.pop(key)
+        self._memory_size -= size
+
+    def _evict_disk(self):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.disk_bytes:
+            return
+
+        # 최대 크기의 90%까지 오래 안 쓴 항목부터 삭제
+        target = total - int(self.disk_bytes * 0.9)
+        freed = 0
+        rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        stale = []
+        for key, size in rows:
+            if freed >= target:
+                break
+            stale.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        with self._lock:
+            self._stats["evictions"] += len(stale)
@@ -0,0 +1,348 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from itertools import islice, zip_longest
+
+import pandas as pd
+
+from api_utils import MAX_PAGE_SIZE, ApiError, _iter_ordered, fetch_total, flatten_records, iter_pages
+from expand import expand_records
+from profiling import stage
+from config import (
+    FETCH_MAX_WORKERS,
+    RESULT_STORE_DB,
+    RESULT_STORE_MAX_RESULTS,
+    RESULT_MAX_RETAINED_RECORDS,
+    SERVER_TABLE_MAX_RECORDS,
+)
+
+RESULT_HANDLE_TTL = 7 * 24 * 3600  # 핸들 메타데이터 보관 기간 (초)
+
+# Dash DataTable filter_query 연산자 (Dash 공식 예제 형식)
+FILTER_OPERATORS = [
+    ["ge ", ">="],
+    ["le ", "<="],
+    ["lt ", "<"],
+    ["gt ", ">"],
+    ["ne ", "!="],
+    ["eq ", "="],
+    ["contains "],
+    ["datestartswith "],
+]
+
+
+class Result:
+    """
+    한 번의 조회 결과 (핸들로 여러 콜백 / 라우트가 공유)
+    - template: API 버튼의 엔드포인트 템플릿 (":param" 포함)
+    - endpoint / params: 실제 조회한 엔드포인트 (인자 입력 전이면 endpoint=None)
+    - sources: 인자에 목록 / 범위를 넣은 경우 [{"values": {인자: 값}, "endpoint": ...}, ...]
+      -> 엔드포인트들을 동시에 받아 한 결과로 이어 붙임 (endpoint에는 템플릿)
+    - pages: 앞에서부터 연속으로 받아둔 페이지 (per_page=MAX_PAGE_SIZE)
+      미리보기가 받은 첫 페이지를 내보내기 / 서버 측 테이블이 그대로 이어서 사용
+    """
+
+    def __init__(self, handle, template, endpoint=None, params=None, sources=None):
+        self.handle = handle
+        self.template = template
+        self.endpoint = endpoint
+        self.params = dict(params or {})
+        self.sources = sources
+        self.pages = []
+        self.retained = 0  # pages에 들고 있는 레코드 수
+        self.complete = False  # 마지막 페이지까지 pages에 들어 있는지
+        self._lock = threading.Lock()
+        self._frame_lock = threading.Lock()
+        self._frames = {}  # expand 여부 -> DataFrame
+        self._source_preview = None  # 여러 엔드포인트 결과의 미리보기 레코드
+
+    def preview(self, n):
+        """앞에서 n개 레코드 (첫 페이지만 받아둠)"""
+        if self.sources:
+            return self._preview_sources(n)
+        if not self.pages and not self.complete:
+            for _ in self.iter_pages():
+                break
+        return [record for page in self.pages[:1] for record in page][:n]
+
+    def _preview_sources(self, n):
+        """
+        여러 엔드포인트 결과의 미리보기: 앞쪽 엔드포인트 n개의 첫 페이지를 동시에 받아 번갈아 n개
+        (첫 엔드포인트만 보이지 않고 ":인자" 컬럼에 여러 값이 나오도록, 첫 페이지는 응답 캐시에 남음)
+        """
+        if self._source_preview is None or len(self._source_preview) < n:
+            count = min(n, len(self.sources))
+            pages = [
+                _source_page(self.sources[index], first)
+                for index, first in enumerate(_iter_ordered(self._first_page, range(count), FETCH_MAX_WORKERS))
+            ]
+            records = [record for row in zip_longest(*pages) for record in row if record is not None]
+            self._source_preview = records[:n]
+        return self._source_preview[:n]
+
+    def iter_pages(self, start_page=1, retain=True):
+        """
+        받아둔 페이지부터 yield한 뒤, 이어지는 페이지는 새로 받아오면서 yield
+        - 새로 받은 페이지도 RESULT_MAX_RETAINED_RECORDS까지는 pages에 보관 -> 다음 소비자가 재사용
+        - retain=False면 새로 받은 페이지는 보관하지 않음 (CSV 내보내기처럼 한 번 쓰고 버리는 소비자용,
+          내보내기가 끝난 뒤에도 전체 결과가 워커 메모리에 남지 않도록)
+        - start_page: 체크포인트에서 이어 받을 때 시작 페이지 (1부터)
+        """
+        index = start_page - 1
+        while True:
+            with self._lock:
+                page = self.pages[index] if index < len(self.pages) else None
+                complete = self.complete
+            if page is not None:
+                yield page
+                index += 1
+                continue
+            if complete:
+                return
+
+            # 받아둔 페이지가 끝난 지점부터 이어서 요청
+            for page_data in self._fetch_pages(start_page=index + 1):
+                with self._lock:
+                    if retain and len(self.pages) == index and self.retained < RESULT_MAX_RETAINED_RECORDS:
+                        self.pages.append(page_data)
+                        self.retained += len(page_data)
+                index += 1
+                yield page_data
+
+            with self._lock:
+                if len(self.pages) == index:
+                    self.complete = True
+            return
+
+    def _fetch_pages(self, start_page=1):
+        if not self.sources:
+            return iter_pages(self.endpoint, params=self.params, start_page=start_page)
+        return islice(self._iter_source_pages(), start_page - 1, None)
+
+    def _iter_source_pages(self):
+        """
+        sources의 엔드포인트를 순서대로 이어 붙여 페이지 단위로 yield
+        - 첫 엔드포인트의 첫 페이지는 바로 요청해서 yield (미리보기는 요청 한 번으로 끝남)
+        - 나머지 엔드포인트는 첫 페이지만 스레드 풀에서 미리 받고, 뒤 페이지는 차례가 오면 이어서 받음
+          (엔드포인트 하나를 통째로 메모리에 모으지 않음)
+        - 레코드 앞에 ":인자" 컬럼으로 어떤 값으로 조회했는지 표시
+        - 엔드포인트 하나가 실패해도 (없는 id 등) 나머지는 계속, 실패는 error 행으로 남김
+        """
+        per_page = int(self.params.get("per_page", MAX_PAGE_SIZE))
+
+        def pages_of(source, first):
+            if not first:
+                return
+            yield _source_page(source, first)
+            if isinstance(first, ApiError) or len(first) < per_page:
+                return  # 실패했거나 한 페이지짜리 (대부분의 :id 조회)
+            try:
+                for page in iter_pages(source["endpoint"], params=self.params, start_page=2):
+                    if page:
+                        yield _source_page(source, page)
+            except ApiError as e:
+                yield _source_page(source, e)
+
+        yield from pages_of(self.sources[0], self._first_page(0))
+        rest = range(1, len(self.sources))
+        for index, first in zip(rest, _iter_ordered(self._first_page, rest, FETCH_MAX_WORKERS)):
+            yield from pages_of(self.sources[index], first)
+
+    def _first_page(self, index):
+        """sources[index]의 첫 페이지 (실패하면 ApiError를 raise하지 않고 반환)"""
+        try:
+            return next(iter_pages(self.sources[index]["endpoint"], params=self.params), [])
+        except ApiError as e:
+            return e
+
+    def total(self):
+        """전체 레코드 수 (여러 엔드포인트를 합친 결과면 미리 알 수 없어서 None)"""
+        if self.sources:
+            return None
+        return fetch_total(self.endpoint, self.params)
+
+    def iter_records(self, retain=True):
+        for page in self.iter_pages(retain=retain):
+            yield from page
+
+    def frame(self, expand=False, max_records=SERVER_TABLE_MAX_RECORDS):
+        """
+        평탄화된 결과 DataFrame (처음 한 번만 만듦)
+        - 앞에서부터 max_records건까지만 받음 (콜백 안에서 끝없이 페이지를 받지 않도록)
+        - expand=True면 user / project / campus 등 참조를 전체 정보로 펼친 뒤 평탄화
+          (받은 레코드의 id를 한 번에 모아서 묶음 요청)
+        """
+        with self._frame_lock:
+            if expand not in self._frames:
+                records = []
+                for page in self.iter_pages():
+                    records.extend(page[: max_records - len(records)])
+                    if len(records) >= max_records:
+                        break
+                rows = flatten_records(expand_records(records) if expand else records)
+                with stage("dataframe"):
+                    self._frames[expand] = pd.DataFrame(rows)
+            return self._frames[expand]
+
+
+def _source_page(source, page):
+    """
+    페이지 레코드 앞에 조회 인자(":인자") 컬럼을 붙인 새 페이지
+    (page가 ApiError면 그 엔드포인트의 실패를 error 행 하나로)
+    """
+    tags = {f":{name}": value for name, value in source["values"].items()}
+    if isinstance(page, ApiError):
+        return [{**tags, "error": str(page)}]
+    return [{**tags, **record} if isinstance(record, dict) else {**tags, "value": record} for record in page]
+
+
+class ResultStore:
+    """
+    핸들 -> Result 레지스트리
+    - dcc.Store("selected-endpoint")에는 엔드포인트 대신 핸들만 저장
+    - Result는 워커 메모리에 최근 max_results개만 LRU로 유지
+    - 핸들의 (템플릿, 엔드포인트, 파라미터)는 SQLite에 기록 -> 다른 워커 / 백그라운드 프로세스도
+      같은 핸들로 Result를 다시 만들 수 있음 (페이지는 응답 캐시에서 나옴)
+    """
+
+    def __init__(self, db_path=RESULT_STORE_DB, max_results=RESULT_STORE_MAX_RESULTS):
+        self.db_path = db_path
+        self.max_results = max_results
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    handle TEXT PRIMARY KEY,
+                    template TEXT NOT NULL,
+                    endpoint TEXT,
+                    params TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            # 목록 / 범위 조회의 엔드포인트 목록 (예전 DB에는 컬럼 추가)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+            if "sources" not in columns:
+                conn.execute("ALTER TABLE results ADD COLUMN sources TEXT")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def register(self, template, endpoint=None, params=None, sources=None):
+        """새 결과 핸들 발급"""
+        result = Result(uuid.uuid4().hex, template, endpoint, params, sources)
+        with self._connect() as conn:
+            # 오래된 핸들 정리 (RESULT_HANDLE_TTL 이후에는 다시 조회해야 함)
+            conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - RESULT_HANDLE_TTL,))
+            conn.execute(
+                "INSERT INTO results (handle, template, endpoint, params, created_at, sources) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    result.handle, template, endpoint, json.dumps(result.params, ensure_ascii=False), time.time(),
+                    json.dumps(sources, ensure_ascii=False) if sources else None,
+                ),
+            )
+        self._remember(result)
+        return result
+
+    def get(self, handle):
+        """핸들 -> Result (모르는 핸들이면 None)"""
+        if not handle:
+            return None
+        with self._lock:
+            result = self._results.get(handle)
+            if result:
+                self._results.move_to_end(handle)
+                return result
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT template, endpoint, params, sources FROM results WHERE handle = ?", (handle,)
+            ).fetchone()
+        if not row:
+            return None
+        result = Result(handle, row[0], row[1], json.loads(row[2]), json.loads(row[3]) if row[3] else None)
+        return self._remember(result)
+
+    def _remember(self, result):
+        with self._lock:
+            # 다른 스레드가 먼저 만들었으면 그걸 사용
+            result = self._results.setdefault(result.handle, result)
+            self._results.move_to_end(result.handle)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return result
+
+
+def split_filter_part(filter_part):
+    """'{user.login} contains abc' -> ("user.login", "contains", "abc")"""
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator not in filter_part:
+                continue
+            name_part, value_part = filter_part.split(operator, 1)
+            name = name_part[name_part.find("{") + 1: name_part.rfind("}")]
+
+            value_part = value_part.strip()
+            if value_part and value_part[0] == value_part[-1] and value_part[0] in ("'", '"', "`"):
+                value = value_part[1:-1].replace("\\" + value_part[0], value_part[0])
+            else:
+                try:
+                    value = float(value_part)
+                except ValueError:
+                    value = value_part
+
+            # 단어 연산자(eq 등)는 첫 번째 표기로 통일
+            return name, operator_type[0].strip(), value
+    return None, None, None
+
+
+def query_page(frame, page_current, page_size, sort_by=None, filter_query=""):
+    """
+    필터 -> 정렬 -> 현재 페이지만 잘라서 (records, page_count, 필터 후 전체 행 수) 반환
+    """
+    df = frame
+    for filter_part in (filter_query or "").split(" && "):
+        col_name, operator, value = split_filter_part(filter_part)
+        if col_name not in df.columns:
+            continue
+        column = df[col_name]
+        if operator in ("eq", "ne", "lt", "le", "gt", "ge"):
+            # 숫자로 필터하는데 컬럼이 문자열이면 숫자로 변환해서 비교
+            if isinstance(value, float) and not pd.api.types.is_numeric_dtype(column):
+                column = pd.to_numeric(column, errors="coerce")
+            df = df.loc[getattr(column, operator)(value)]
+        elif operator == "contains":
+            df = df.loc[column.astype(str).str.contains(str(value), case=False, regex=False, na=False)]
+        elif operator == "datestartswith":
+            df = df.loc[column.astype(str).str.startswith(str(value), na=False)]
+
+    if sort_by:
+        sort_by = [col for col in sort_by if col["column_id"] in df.columns]
+        if sort_by:
+            df = df.sort_values(
+                [col["column_id"] for col in sort_by],
+                ascending=[col["direction"] == "asc" for col in sort_by],
+                na_position="last",
+                kind="mergesort",
+                # 숫자/문자가 섞인 컬럼은 문자열 기준으로 정렬
+                key=lambda column: column.astype(str) if column.dtype == object else column,
+            )
+
+    total = len(df)
+    page_count = max(1, -(-total // page_size))
+    start = page_current * page_size
+    page = df.iloc[start: start + page_size]
+    # NaN은 JSON으로 못 보내므로 None으로
+    records = page.astype(object).where(page.notna(), None).to_dict("records")
+    return records, page_count, total
+
+
+# 모든 콜백이 공유하는 결과 저장소
+result_store = ResultStore()
@@ -1,8 +1,11 @@
-import requests
+import argparse
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-from config import API_BASE_URL, TOKEN_URL, UID, SECRET
-from api_utils import get_access_token
-import urllib.parse  # URL 인코딩용
+from api_utils import MAX_PAGE_SIZE, ApiError, iter_records
+from config import FETCH_MAX_WORKERS
 
 
 def flatten_json(json_data, prefix=""):
@@ -25,44 +28,84 @@ def flatten_json(json_data, prefix=""):
 
 def fetch_and_save_user_data(user_id):
     """API에서 유저 정보를 가져와 CSV로 저장"""
-    access_token = get_access_token()
-    print(f"🔑 액세스 토큰: {access_token}")
-
-    if not access_token:
-        print("❌ 유효한 액세스 토큰이 없습니다.")
+    # ✅ filter[login]=user_id 로 조회, 첫 번째 레코드가 오는 즉시 사용
+    params = {"filter[login]": user_id}
+    print(f"🔗 요청: /v2/users {params}")
+
+    try:
+        user_data = next(iter_records("/v2/users", params=params, max_pages=1), None)
+    except ApiError as e:
+        print(f"❌ 유저 정보를 가져올 수 없습니다: {e}")
         return
 
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'User-Agent': '42DashboardClient'
-    }
-
-    # ✅ 올바른 API URL 적용 (filter[login]=user_id)
-    query_params = urllib.parse.urlencode({"filter[login]": user_id})
-    api_url = f"{API_BASE_URL}/users?{query_params}"
+    if not user_data:
+        print("⚠️ 사용자 데이터를 찾을 수 없습니다.")
+        return
+    print(f"📄 응답 데이터: {user_data}")
 
-    print(f"🔗 요청 URL: {api_url}")
+    # JSON을 평탄화하여 CSV로 저장
+    flat_user_data = flatten_json(user_data)
+    df = pd.DataFrame([flat_user_data])
+    df.to_csv("user_data.csv", index=False, encoding="utf-8")
+    print("✅ CSV 저장 완료!")
 
-    response = requests.get(api_url, headers=headers)
-    print(f"📡 응답 상태 코드: {response.status_code}")
 
-    if response.status_code == 200:
-        user_data = response.json()
-        print(f"📄 응답 데이터: {user_data}")
+def read_logins(source):
+    """파일(또는 "-"면 stdin)에서 로그인 목록 읽기 (공백 / 쉼표 / 줄바꿈 구분, 중복 제거, 순서 유지)"""
+    if source == "-":
+        text = sys.stdin.read()
+    else:
+        with open(source, encoding="utf-8") as f:
+            text = f.read()
+    return list(dict.fromkeys(login for login in re.split(r"[\s,]+", text) if login))
+
+
+def fetch_users_batch(logins):
+    """로그인 최대 100개를 filter[login]=a,b,c 요청 하나로 조회"""
+    params = {"filter[login]": ",".join(logins), "per_page": MAX_PAGE_SIZE}
+    return list(iter_records("/v2/users", params=params))
+
+
+def fetch_and_save_users_bulk(logins, output="users_data.csv"):
+    """
+    여러 유저를 한 번에 조회해서 CSV 하나로 저장
+    - 로그인을 MAX_PAGE_SIZE개씩 묶어 filter[login]으로 조회 (N명 -> 약 N/100 요청)
+    - 묶음들은 스레드 풀에서 동시에 요청 (FETCH_MAX_WORKERS개까지)
+    """
+    batches = [logins[i: i + MAX_PAGE_SIZE] for i in range(0, len(logins), MAX_PAGE_SIZE)]
+    print(f"🔗 요청: /v2/users {len(logins)}명 -> {len(batches)}개 묶음")
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(FETCH_MAX_WORKERS, len(batches)) or 1) as executor:
+            users = [user for batch in executor.map(fetch_users_batch, batches) for user in batch]
+    except ApiError as e:
+        print(f"❌ 유저 정보를 가져올 수 없습니다: {e}")
+        return
 
-        if not user_data:
-            print("⚠️ 사용자 데이터를 찾을 수 없습니다.")
-            return
+    # 요청한 순서대로 정렬, 못 찾은 로그인은 따로 알림
+    order = {login: i for i, login in enumerate(logins)}
+    users.sort(key=lambda user: order.get(user.get("login"), len(order)))
+    missing = set(logins) - {user.get("login") for user in users}
+    if missing:
+        print(f"⚠️ 찾지 못한 로그인 {len(missing)}개: {', '.join(sorted(missing))}")
+    if not users:
+        print("⚠️ 사용자 데이터를 찾을 수 없습니다.")
+        return
 
-        # JSON을 평탄화하여 CSV로 저장
-        flat_user_data = flatten_json(user_data[0])  # 리스트에서 첫 번째 유저 데이터 선택
-        df = pd.DataFrame([flat_user_data])
-        df.to_csv("user_data.csv", index=False, encoding="utf-8")
-        print("✅ CSV 저장 완료!")
-    else:
-        print(f"❌ 유저 정보를 가져올 수 없습니다: {response.status_code}, {response.text}")
+    df = pd.DataFrame([flatten_json(user) for user in users])
+    df.to_csv(output, index=False, encoding="utf-8")
+    print(f"✅ CSV 저장 완료! ({len(users)}명 -> {output})")
 
 
 if __name__ == "__main__":
-    user_id = input("Enter User ID: ")
-    fetch_and_save_user_data(user_id)
+    # 예: python save_user_data.py --logins cohort.txt / cat cohort.txt | python save_user_data.py --logins -
+    parser = argparse.ArgumentParser(description="42 유저 정보를 CSV로 저장")
+    parser.add_argument("--logins", metavar="FILE", help="로그인 목록 파일 (\"-\"면 stdin), 없으면 한 명 입력")
+    parser.add_argument("--output", default="users_data.csv", help="여러 명 조회 결과 파일")
+    args = parser.parse_args()
+
+    if args.logins:
+        fetch_and_save_users_bulk(read_logins(args.logins), args.output)
+    else:
+        user_id = input("Enter User ID: ")
+        fetch_and_save_user_data(user_id)
@@ -0,0 +1,265 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from api_utils import iter_pages
+from blackhole.get_all_blackhole import blackholed_frame
+from config import EXPORT_DIR, JOBS_DB, JOBS_FILE, SCHEDULER_POLL_SECONDS
+from csv_export import write_csv_checkpointed
+from mirror import Mirror
+from locks import file_lock
+
+
+# 작업 종류별 실행 함수: args -> (결과 행 수, EXPORT_DIR 안의 파일 이름 또는 None)
+def run_blackhole_job(name, args):
+    """캠퍼스 하나의 블랙홀 유저 조회 (year_month="current"면 이번 달)"""
+    year_month = args.get("year_month", "current")
+    if year_month == "current":
+        year_month = datetime.today().strftime("%Y-%m")
+    df = blackholed_frame(year_month, str(args.get("campus_id", "29")), args.get("use_mirror", False))
+
+    filename = f"job_{name}.csv"
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, filename)
+    df.to_csv(path + ".part", index=False, encoding="utf-8")
+    os.replace(path + ".part", path)
+    return len(df), filename
+
+
+def run_mirror_sync_job(name, args):
+    """로컬 미러 증분 동기화 (파일 없이 미러 DB만 갱신)"""
+    return Mirror(args["resource"]).sync(args.get("filters")), None
+
+
+def run_export_job(name, args):
+    """엔드포인트 전체를 CSV로 저장 (실패하면 다음 실행이 체크포인트에서 이어받음)"""
+    filename = f"job_{name}.csv"
+    params = args.get("params")
+    _, rows = write_csv_checkpointed(
+        lambda start_page: iter_pages(args["endpoint"], params=params, start_page=start_page),
+        {"job": name, "endpoint": args["endpoint"], "params": params},
+        filename,
+    )
+    return rows, filename
+
+
+JOB_TYPES = {
+    "blackhole": run_blackhole_job,
+    "mirror_sync": run_mirror_sync_job,
+    "export": run_export_job,
+}
+
+
+def load_jobs(path=JOBS_FILE):
+    """
+    jobs.json -> 작업 목록
+    - "at": "04:00" -> 매일 그 시각 (서버 로컬 시간), "every_minutes": N -> N분마다
+    - 파일이 없으면 빈 목록
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        jobs = json.load(f).get("jobs", [])
+    for job in jobs:
+        if job.get("type") not in JOB_TYPES:
+            raise ValueError(f"알 수 없는 작업 종류: {job.get('type')} ({job.get('name')})")
+        if "at" not in job and "every_minutes" not in job:
+            raise ValueError(f"실행 시각(at / every_minutes)이 없는 작업: {job.get('name')}")
+    return jobs
+
+
+def next_run(job, last_started, now, since=None):
+    """
+    마지막 시작 시각(unix time, 없으면 None) 기준 다음 실행 시각 (datetime)
+    - since: 한 번도 안 돈 "at" 작업의 기준 시각 (스케줄러 시작 시각)
+    """
+    if "every_minutes" in job:
+        if last_started is None:
+            return now
+        return datetime.fromtimestamp(last_started) + timedelta(minutes=job["every_minutes"])
+
+    hour, minute = map(int, job["at"].split(":"))
+    # 마지막 실행(없으면 스케줄러 시작) 이후 처음 오는 그 시각
+    last_started = last_started or since
+    base = datetime.fromtimestamp(last_started) if last_started else now
+    candidate = base.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= base:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+class JobState:
+    """
+    작업별 마지막 실행 결과 (SQLite)
+    - 대시보드는 이 표를 읽어 결과 파일과 신선도(마지막 성공 시각)를 보여줌
+    - DB 파일은 처음 작업을 실행할 때 만듦 (스케줄러를 켜지 않으면 파일도 생기지 않음)
+    """
+
+    def __init__(self, db_path=JOBS_DB):
+        self.db_path = db_path
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS job_state (
+                        name TEXT PRIMARY KEY,
+                        status TEXT NOT NULL,
+                        started_at REAL,
+                        finished_at REAL,
+                        succeeded_at REAL,
+                        rows INTEGER,
+                        filename TEXT,
+                        error TEXT
+                    )
+                    """
+                )
+            self._initialized = True
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, name):
+        states = self.all([name])
+        return states[0] if states else None
+
+    def all(self, names=None):
+        if not self._initialized and not os.path.exists(self.db_path):
+            return []  # 아직 한 번도 실행한 적 없음
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = [dict(row) for row in conn.execute("SELECT * FROM job_state ORDER BY name")]
+        if names is not None:
+            rows = [row for row in rows if row["name"] in names]
+        return rows
+
+    def started(self, name):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO job_state (name, status, started_at) VALUES (?, 'running', ?)
+                ON CONFLICT(name) DO UPDATE SET status = 'running', started_at = excluded.started_at
+                """,
+                (name, time.time()),
+            )
+
+    def finished(self, name, rows, filename):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                UPDATE job_state SET status = 'ok', finished_at = ?, succeeded_at = ?,
+                    rows = ?, filename = ?, error = NULL
+                WHERE name = ?
+                """,
+                (now, now, rows, filename, name),
+            )
+
+    def failed(self, name, error):
+        # 이전에 성공한 결과(rows / filename / succeeded_at)는 그대로 둠 -> 대시보드는 예전 결과를 계속 보여줌
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE job_state SET status = 'failed', finished_at = ?, error = ? WHERE name = ?",
+                (time.time(), error, name),
+            )
+
+
+class Scheduler:
+    """
+    jobs.json의 작업을 정해진 시각에 실행하는 프로세스 내 스케줄러
+    - 스레드 하나가 poll_seconds마다 실행할 작업을 확인하고 순서대로 실행
+      (예약 작업은 대부분 전체 조회라 동시에 돌리면 대시보드 사용자의 요청이 밀림)
+    - 작업마다 파일 락을 잡은 뒤 상태를 다시 확인 -> Dash 워커가 여러 개여도 한 번만 실행
+    """
+
+    def __init__(self, jobs_file=JOBS_FILE, state=None, poll_seconds=SCHEDULER_POLL_SECONDS):
+        self.jobs_file = jobs_file
+        self.state = state or JobState()
+        self.poll_seconds = poll_seconds
+        self._since = time.time()
+        self._thread = None
+
+    def jobs(self):
+        return load_jobs(self.jobs_file)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_due()
+            except Exception as e:  # 설정 파일 오류 등으로 스케줄러 스레드가 죽지 않도록
+                print(f"❌ 스케줄러 오류: {e}")
+            time.sleep(self.poll_seconds)
+
+    def run_due(self):
+        now = datetime.now()
+        for job in self.jobs():
+            state = self.state.get(job["name"])
+            if next_run(job, state and state["started_at"], now, self._since) <= now:
+                self.run(job, force=False)
+
+    def run(self, job, force=True):
+        """작업 하나 실행 (force=False면 락을 잡은 뒤 아직 실행할 차례인지 다시 확인)"""
+        name = job["name"]
+        with file_lock(os.path.join(os.path.dirname(self.state.db_path), f"{name}.lock")):
+            state = self.state.get(name)
+            now = datetime.now()
+            if not force and next_run(job, state and state["started_at"], now, self._since) > now:
+                return  # 다른 워커가 방금 실행함
+            self.state.started(name)
+            print(f"⏰ 예약 작업 시작: {name}")
+            started = time.time()
+            try:
+                rows, filename = JOB_TYPES[job["type"]](name, job.get("args", {}))
+            except Exception as e:
+                self.state.failed(name, str(e))
+                print(f"❌ 예약 작업 실패: {name} ({e})")
+                return
+            self.state.finished(name, rows, filename)
+            print(f"✅ 예약 작업 완료: {name} ({rows}건, {time.time() - started:.1f}초)")
+
+    def overview(self):
+        """대시보드 표시용: 설정된 작업 + 마지막 실행 결과 + 다음 실행 시각"""
+        states = {state["name"]: state for state in self.state.all()}
+        now = datetime.now()
+        rows = []
+        for job in self.jobs():
+            state = states.get(job["name"], {})
+            rows.append({
+                **state,
+                "name": job["name"],
+                "type": job["type"],
+                "status": state.get("status", "pending"),
+                "next_run": next_run(job, state.get("started_at"), now, self._since),
+            })
+        return rows
+
+
+scheduler = Scheduler()
+
+
+if __name__ == "__main__":
+    # 예: python scheduler.py / python scheduler.py --run blackhole-29-monthly
+    parser = argparse.ArgumentParser(description="예약 작업 확인 / 즉시 실행")
+    parser.add_argument("--run", metavar="NAME", help="작업 하나를 지금 실행 (없으면 작업 목록 출력)")
+    args = parser.parse_args()
+
+    if args.run:
+        job = next((job for job in scheduler.jobs() if job["name"] == args.run), None)
+        if not job:
+            parser.error(f"jobs.json에 없는 작업: {args.run}")
+        scheduler.run(job)
+    else:
+        for row in scheduler.overview():
+            succeeded = row.get("succeeded_at")
+            last = f"{datetime.fromtimestamp(succeeded):%Y-%m-%d %H:%M}" if succeeded else "-"
+            print(f"{row['name']:<28} {row['status']:<8} 마지막 성공: {last}  다음 실행: {row['next_run']:%Y-%m-%d %H:%M}")
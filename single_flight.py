@@ -0,0 +1,59 @@
+import threading
+
+
+class _Call:
+    """진행 중인 요청 하나 (먼저 온 스레드가 실행, 나머지는 done을 기다림)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    같은 key의 요청이 동시에 들어오면 HTTP 요청은 한 번만 보내고 결과를 나눠 가짐
+    - 먼저 온 스레드(leader)가 fn()을 실행, 그동안 들어온 스레드는 같은 결과(또는 예외)를 받음
+    - 끝난 요청은 바로 잊음 -> 이후 요청은 응답 캐시가 처리
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"executed": 0, "coalesced": 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        total = stats["executed"] + stats["coalesced"]
+        stats["coalesced_ratio"] = stats["coalesced"] / total if total else 0.0
+        return stats
@@ -0,0 +1,114 @@
+import json
+import os
+import threading
+import time
+
+from config import TOKEN_URL, UID, SECRET, TOKEN_CACHE_PATH, TOKEN_REFRESH_MARGIN
+from http_client import get_client
+from locks import file_lock
+
+class TokenManager:
+    """
+    client_credentials 액세스 토큰을 메모리 + 디스크에 캐시
+    - expires_in 기준으로 만료 margin초 전까지는 캐시된 토큰을 그대로 사용
+    - 갱신은 프로세스 안에서는 threading.Lock, 프로세스 사이에서는 파일 락으로
+      한 곳에서만 일어나고, 나머지는 갱신된 디스크 캐시를 읽어감
+    """
+
+    def __init__(self, cache_path=TOKEN_CACHE_PATH, margin=TOKEN_REFRESH_MARGIN):
+        self.cache_path = cache_path
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "refreshes": 0, "failures": 0}
+
+    def _is_fresh(self, expires_at):
+        return expires_at - self.margin > time.time()
+
+    def get_token(self):
+        # 1) 메모리 캐시 (락 없이 확인)
+        token, expires_at = self._token, self._expires_at
+        if token and self._is_fresh(expires_at):
+            self._stats["memory_hits"] += 1
+            return token
+
+        with self._lock:
+            # 기다리는 동안 다른 스레드가 갱신했을 수 있음
+            if self._token and self._is_fresh(self._expires_at):
+                self._stats["memory_hits"] += 1
+                return self._token
+
+            with file_lock(self.cache_path + ".lock"):
+                # 2) 디스크 캐시 (다른 워커 / 스크립트가 받아둔 토큰)
+                cached = self._read_disk()
+                if cached and self._is_fresh(cached["expires_at"]):
+                    self._set(cached)
+                    self._stats["disk_hits"] += 1
+                    return self._token
+
+                # 3) 토큰 새로 발급
+                fresh = self._request_token()
+                if not fresh:
+                    self._stats["failures"] += 1
+                    return None
+                self._write_disk(fresh)
+                self._set(fresh)
+                self._stats["refreshes"] += 1
+                return self._token
+
+    def invalidate(self):
+        """401 등으로 토큰이 무효해졌을 때 메모리 / 디스크 캐시를 모두 버림"""
+        with self._lock:
+            self._token, self._expires_at = None, 0.0
+            with file_lock(self.cache_path + ".lock"):
+                if os.path.exists(self.cache_path):
+                    os.remove(self.cache_path)
+
+    def stats(self):
+        """캐시 적중 현황 (hit_ratio = 토큰 요청 없이 처리된 비율)"""
+        stats = dict(self._stats)
+        total = stats["memory_hits"] + stats["disk_hits"] + stats["refreshes"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / total if total else 0.0
+        return stats
+
+    def _set(self, cached):
+        self._token = cached["access_token"]
+        self._expires_at = cached["expires_at"]
+
+    def _request_token(self):
+        data = {"grant_type": "client_credentials"}
+        response = get_client().post(TOKEN_URL, data=data, auth=(UID, SECRET))
+        if response.status_code != 200:
+            print(f"🔑 토큰 요청 실패: {response.status_code}, {response.text}")
+            return None
+
+        body = response.json()
+        # created_at이 없으면 지금 시각 기준 (expires_in 기본 2시간)
+        created_at = body.get("created_at") or time.time()
+        return {
+            "access_token": body.get("access_token"),
+            "expires_at": created_at + body.get("expires_in", 7200),
+        }
+
+    def _read_disk(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not cached.get("access_token"):
+            return None
+        return cached
+
+    def _write_disk(self, cached):
+        # 임시 파일에 쓰고 교체 -> 다른 프로세스가 반쯤 쓰인 파일을 읽지 않도록
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cached, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.cache_path)
+
+
+# 모든 모듈이 공유하는 토큰 매니저
+token_manager = TokenManager()